@@ -1,18 +1,11 @@
-import yfinance as yf
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
-from datetime import datetime
 import sys
+from analysis import load, safe_slope
 
 # ===============================
 # 0. 공통 함수
 # ===============================
-def flatten(df):
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-    return df
-
 def get_rsi(series, length=14):
     delta = series.diff()
     up = delta.clip(lower=0)
@@ -22,24 +15,16 @@ def get_rsi(series, length=14):
     rs = ema_up / ema_down
     return 100 - (100 / (1 + rs))
 
-def safe_slope(series, window=5):
-    return series.rolling(window).apply(
-        lambda x: np.polyfit(range(len(x)), x, 1)[0]
-        if len(x) == window and not np.isnan(x).any()
-        else 0,
-        raw=True
-    )
-
 print("▶ 삼성전자 매크로 통합 분석 시작")
 
 # ===============================
 # 1. 데이터 다운로드
 # ===============================
 try:
-    samsung = flatten(yf.download("005930.KS", period="1y", progress=False))
-    kospi = flatten(yf.download("^KS11", period="1y", progress=False))
-    dxy = flatten(yf.download("DX-Y.NYB", period="1y", progress=False))
-    us10y = flatten(yf.download("^TNX", period="1y", progress=False))
+    samsung = load("005930.KS")
+    kospi = load("^KS11")
+    dxy = load("DX-Y.NYB")
+    us10y = load("^TNX")
 except Exception as e:
     print("데이터 다운로드 실패:", e)
     sys.exit()
@@ -1,251 +1,1357 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from ohlcv_store import OhlcvStore
+from calendars import valid_until
+from metrics import CACHED_BYTES, StageTimer, record, resident_bytes
+from providers import FileProvider, YFinanceProvider, period_start, period_years
 from datetime import datetime, timedelta, timezone
 import io
-import base64
+import os
+import csv
+import hashlib
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from functools import partial
+from urllib.parse import quote, urlencode
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 
-def flatten(df):
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
+# 캐시된 프레임은 여러 분석기가 공유하므로 Copy-on-Write 로 읽기 전용처럼 다룬다
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# matplotlib 은 PNG 차트를 그릴 때 처음 임포트한다 (series 모드와 서버리스 콜드 스타트에서는 임포트하지 않음)
+# pyplot 없이 Figure 만 쓰므로 백엔드 탐색 없이 Agg 로 고정
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# 캐시된 시세의 유효 시간은 거래소 세션 기준 (calendars.py): 세션 중에는 간격별 TTL, 장이 닫혀 있으면 다음 개장까지
+# 거래소를 모르는 심볼과 24/7 인 암호화폐는 항상 간격별 TTL
+CACHE_TTL = 300  # seconds
+SESSION_TTLS = {"1d": CACHE_TTL, "1h": CACHE_TTL, "5m": CACHE_TTL, "1m": 60}
+# 캐시 개수 상한(CACHE_MAXSIZE)은 페이지 크기에 맞춰 아래(MACRO_SYMBOLS 다음)에서 정한다
+# 분봉은 한 프레임이 수십 MB 라 개수와 함께 전체 바이트로도 캐시 크기를 제한
+CACHE_MAX_BYTES = 512 * 2 ** 20
+
+_frame_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_fetch_locks = {}
+# 묶음 다운로드 중인 키 -> (시작 시각, 끝나면 set 되는 Event)
+_batches = {}
+
+# 분석 가능한 봉 간격과 기본 기간 (yfinance 분봉 제공 한도: 1m 7일, 5m 60일, 1h 730일 - 더 긴 기간은 OHLCV_STORE_DIR 에 쌓인 만큼)
+INTERVALS = ["1d", "1h", "5m", "1m", "1wk", "1mo"]
+# 요청할 수 있는 가장 긴 기간(년). 더 길면 날짜 계산이 pandas 날짜 범위(1677~2262년)를 넘는다
+MAX_PERIOD_YEARS = 100
+DEFAULT_PERIODS = {"1d": "1y", "1h": "6mo", "5m": "1mo", "1m": "7d", "1wk": "10y", "1mo": "10y"}
+# 주봉/월봉은 따로 받지 않고 같은 기간의 일봉을 리샘플링한다 (yfinance 와 같이 주 시작 월요일/월 첫날 라벨)
+# 둘 다 기본 10y 일봉 하나에서 나오고, 더 짧은 일봉 요청(1y 등)도 캐시된 긴 일봉을 잘라 쓴다
+RESAMPLE_RULES = {"1wk": "W-MON", "1mo": "MS"}
+RESAMPLE_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Adj Close": "last", "Volume": "sum"}
+# 분봉 프레임과 지표는 float32 로 보관해 메모리를 절반으로 (일봉은 기존 결과와 같도록 float64)
+INTRADAY_FLOAT32 = True
+# COMPACT_FRAMES=1: 종목 수백 개를 오래 들고 있는 워커용. 일봉도 분석에 쓰는 컬럼(FRAME_COLUMNS)만 float32 로,
+# 신호/점수 컬럼은 int8 로 보관한다 (값은 float32 반올림만큼 달라질 수 있음)
+COMPACT_FRAMES = os.environ.get("COMPACT_FRAMES") == "1"
+FRAME_COLUMNS = ["Close", "Volume"]
+
+# OHLCV_STORE_DIR 를 지정하면 받은 시세를 디스크에 쌓아 두고, 저장된 마지막 바 이후(와 마지막 바 수정분)만 받는다
+# (더 긴 기간을 요청하면 저장 구간 앞의 모자란 부분도 한 번 받아 보충)
+STORE_DIR = os.environ.get("OHLCV_STORE_DIR")
+_store = OhlcvStore(STORE_DIR) if STORE_DIR else None
+
+# 시세 제공자. OFFLINE_DATA_DIR 를 지정하면 네트워크 없이 기록된 CSV(없으면 합성 시세)를 읽는다
+# OFFLINE_LATENCY(초)로 다운로드마다 지연을 넣어 네트워크 왕복을 흉내 낼 수 있다
+OFFLINE_DATA_DIR = os.environ.get("OFFLINE_DATA_DIR")
+if OFFLINE_DATA_DIR:
+    _provider = FileProvider(OFFLINE_DATA_DIR, latency=float(os.environ.get("OFFLINE_LATENCY", "0")))
+else:
+    _provider = YFinanceProvider()
+
+# 분석 대상: (티커, 이름, 기준 지수). 기준 지수가 None 이면 BTC 분석기로 처리
+# WATCHLIST_FILE(csv: ticker,name,baseline)이 있으면 그 목록을 쓴다
+# (baseline 을 비우면 시장별 기본 지수 - BTC-USD 는 BTC 분석기, "none" 이면 BTC 분석기)
+WATCHLIST = [
+    ("BTC-USD", "Bitcoin", None),
+    ("066570.KS", "LG전자", "^KS11"),
+    ("005930.KS", "삼성전자", "^KS11"),
+]
+WATCHLIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "watchlist.csv")
+PAGE_SIZE = 50
+# /analyze 의 page_size 상한
+MAX_PAGE_SIZE = 200
+# 다중 심볼 다운로드 한 번에 묶는 심볼 수
+BATCH_SIZE = 50
+# 종목 고유 심볼의 묶음 다운로드가 요청 제한 시간의 이 비율이 지나도 안 끝나면 기다리던 분석기는 자기 심볼만 따로 받는다
+# (느린 심볼 하나가 같은 묶음의 다른 종목까지 붙잡지 않게. 남은 시간은 따로 받고 분석하는 데 쓴다)
+# 여러 분석기가 같이 쓰는 심볼(매크로/기준 지수)은 따로 받지 않고 묶음이 끝날 때까지 기다린다
+BATCH_FALLBACK = 0.5
+MACRO_SYMBOLS = ["DX-Y.NYB", "^TNX"]
+# 시장별 기본 기준 지수 (default_baseline, BTC 분석기의 ^GSPC)
+BASELINES = ["^KS11", "^KQ11", "^GSPC"]
+# 프레임 캐시/지표 상태 개수: 가장 큰 페이지의 종목 + 기준 지수 + 매크로가 모두 들어가야 prefetch 한 프레임이 쓰이기 전에 밀려나지 않는다
+# 주봉/월봉과 잘라 쓴 일봉은 원본 일봉도 함께 남으므로 두 배
+CACHE_MAXSIZE = 2 * (MAX_PAGE_SIZE + len(BASELINES) + len(MACRO_SYMBOLS))
+
+# sequential: 순차 실행 / thread: 다운로드와 분석을 스레드 풀에서 / process: 다운로드는 스레드, 지표·렌더링은 프로세스 풀에서
+EXECUTOR = "thread"
+MAX_WORKERS = 4
+# 프로세스 풀 워커는 부모를 fork 하지 않고 forkserver(없는 플랫폼은 spawn)로 만든다
+# fork 하면 다른 스레드(prefetch, 백그라운드 갱신)가 잡고 있던 _fetch_locks 등이 잠긴 채 복사돼 워커의 load() 가 영영 기다린다
+PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# 차트 템플릿(Figure)은 프로세스당 하나를 재사용하므로 렌더링 구간은 직렬화
+_plot_lock = threading.Lock()
+_chart = None
+
+# 렌더링한 PNG 는 (종목, 데이터 버전) 별로 보관하고 /chart 엔드포인트가 그대로 내려준다
+# 저장소에서 밀려났거나 다른 인스턴스(서버리스)에서 그린 차트는 요청이 오면 같은 조건으로 다시 그린다 (chart_png)
+# 페이지 하나의 차트와, 갱신 중에 바뀐 버전까지 들어가도록
+CHART_CACHE_MAXSIZE = 2 * MAX_PAGE_SIZE
+_charts = OrderedDict()
+_charts_lock = threading.Lock()
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+# 요청 조건(mode/page) 별 마지막 분석 결과(스냅샷)와 진행 중인 갱신. 스냅샷이 SNAPSHOT_MAX_AGE 초보다 오래되면 백그라운드에서 갱신
+# 조건 조합(page, period ...)은 요청마다 달라질 수 있으므로 최근 SNAPSHOT_MAXSIZE 개만 둔다
+SNAPSHOT_MAX_AGE = 60
+SNAPSHOT_MAXSIZE = 32
+_snapshot = OrderedDict()
+_snapshot_lock = threading.Lock()
+_refresh = {}
+
+# 동시에 실행할 수 있는 분석 수. 요청 처리, 백그라운드 갱신, 스트리밍, 프로파일링 모두 이 슬롯을 잡고 분석한다
+MAX_CONCURRENT_ANALYSES = 2
+_analysis_slots = threading.BoundedSemaphore(MAX_CONCURRENT_ANALYSES)
+
+# 같은 키로 진행 중인 계산 (single-flight)
+_inflight = {}
+_inflight_lock = threading.Lock()
+_async_inflight = {}
+
+def _cache_drop(key):
+    global _cache_bytes
+    _cache_bytes -= _frame_cache.pop(key)[2]
+
+def _cache_get(key):
+    with _cache_lock:
+        entry = _frame_cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            _cache_drop(key)
+            return None
+        _frame_cache.move_to_end(key)
+        return entry[1]
+
+def cache_ttl(symbol, interval="1d", now=None):
+    # 지금 받은 symbol 시세를 캐시에 둘 시간(초)
+    now = now or datetime.now(timezone.utc)
+    return (valid_until(symbol, now, SESSION_TTLS.get(interval, CACHE_TTL)) - now).total_seconds()
+
+def cache_expires_in(keys):
+    # keys 프레임 중 가장 먼저 만료되는 것까지 남은 시간(초). 캐시에 없는 프레임이 있으면 0
+    now = time.monotonic()
+    with _cache_lock:
+        entries = [_frame_cache.get(key) for key in keys]
+    if not entries or any(entry is None for entry in entries):
+        return 0.0
+    return max(0.0, min(entry[0] for entry in entries) - now)
+
+def _cache_expires(key):
+    with _cache_lock:
+        entry = _frame_cache.get(key)
+        return None if entry is None else entry[0]
+
+def _cache_put(key, df, expires=None):
+    # expires: 다른 프레임에서 만든 프레임(리샘플/잘라낸 일봉)은 원본과 같이 만료되도록 원본의 만료 시각
+    global _cache_bytes
+    symbol, _, interval = key
+    nbytes = int(df.memory_usage(index=True).sum())
+    if expires is None:
+        expires = time.monotonic() + cache_ttl(symbol, interval)
+    with _cache_lock:
+        if key in _frame_cache:
+            _cache_drop(key)
+        _frame_cache[key] = (expires, df, nbytes)
+        _cache_bytes += nbytes
+        while len(_frame_cache) > 1 and (len(_frame_cache) > CACHE_MAXSIZE or _cache_bytes > CACHE_MAX_BYTES):
+            _cache_drop(next(iter(_frame_cache)))
+
+def _normalize(df, interval):
+    # 분봉은 거래소마다 타임존이 달라 as-of 정렬이 되도록 UTC 로 맞추고, 옵션에 따라 float32 로 줄인다
+    # COMPACT_FRAMES 면 간격과 상관없이 FRAME_COLUMNS 만 남겨 float32 로 (Volume 정수 컬럼 포함)
+    if df.empty:
+        return df
+    if interval != "1d" and df.index.tz is not None:
+        df = df.tz_convert("UTC")
+    if COMPACT_FRAMES:
+        return df[[col for col in FRAME_COLUMNS if col in df]].astype(np.float32)
+    if interval != "1d" and INTRADAY_FLOAT32:
+        df = df.astype({col: "float32" for col, dtype in df.dtypes.items() if dtype == np.float64})
     return df
 
-def get_rsi(series, length=14):
+def _fetch(symbols, period, interval="1d"):
+    # {symbol: 프레임}. 저장소가 있으면 처음 보는 심볼만 period 전체를, 나머지는 저장된 마지막 바부터 받는다
+    # 저장된 구간이 period 시작보다 늦게 시작하면(더 짧은 기간으로 먼저 받은 심볼) 모자란 앞부분부터 다시 받아 보충
+    if _store is None:
+        frames = _provider.download(symbols, period=period, interval=interval)
+        return {symbol: _normalize(df, interval) for symbol, df in frames.items()}
+
+    last = {symbol: _store.last_timestamp(symbol, interval) for symbol in symbols}
+    new = [symbol for symbol in symbols if last[symbol] is None]
+    since = {symbol: period_start(last[symbol], period) for symbol in symbols if last[symbol] is not None}
+    backfill = [symbol for symbol, start in since.items() if start is not None and _store.first_timestamp(symbol, interval) > start]
+    known = [symbol for symbol in since if symbol not in backfill]
+    if new:
+        for symbol, df in _provider.download(new, period=period, interval=interval).items():
+            _store.write(symbol, df, interval, start=period_start(df.index[-1], period) if not df.empty else None)
+    if backfill:
+        start = min(since[symbol] for symbol in backfill)
+        frames = _provider.download(backfill, start=start.strftime("%Y-%m-%d"), interval=interval)
+        for symbol in backfill:
+            # 받은 것이 없어도(그 전에는 상장 전 등) 요청한 시작까지는 받은 것으로 기록
+            _store.write(symbol, frames.get(symbol, pd.DataFrame()), interval, start=since[symbol])
+    if known:
+        start = min(last[symbol] for symbol in known).strftime("%Y-%m-%d")
+        for symbol, df in _provider.download(known, start=start, interval=interval).items():
+            _store.write(symbol, df, interval)
+
+    frames = {}
+    for symbol in symbols:
+        end = _store.last_timestamp(symbol, interval)
+        if end is not None:
+            frames[symbol] = _normalize(_store.read(symbol, interval, since=period_start(end, period)), interval)
+    return frames
+
+def resample(df, interval):
+    # 일봉 -> 주봉/월봉 (있는 컬럼만: 종가는 마지막, 거래량은 합). 거래가 없는 주/월은 버린다
+    agg = {col: RESAMPLE_AGG[col] for col in df.columns if col in RESAMPLE_AGG}
+    out = df.resample(RESAMPLE_RULES[interval], label="left", closed="left").agg(agg)
+    return out[out["Close"].notna()]
+
+def source_interval(interval):
+    # 실제로 받는 봉 간격 (주봉/월봉은 일봉)
+    return "1d" if interval in RESAMPLE_RULES else interval
+
+def _cached_longer(symbol, period, interval):
+    # 같은 심볼/간격의 더 긴 기간 프레임이 캐시에 있으면 period 만큼 잘라 쓴다 -> (프레임, 원본 키) 또는 None
+    # (period_start 가 None 인 기간 - "max" 나 날짜 범위를 넘는 기간 - 은 잘라 쓸 수 없다)
+    with _cache_lock:
+        keys = [key for key in _frame_cache if key[0] == symbol and key[2] == interval and key[1] != period]
+    for key in keys:
+        df = _cache_get(key)
+        if df is None or df.empty:
+            continue
+        start, longer = period_start(df.index[-1], period), period_start(df.index[-1], key[1])
+        if start is not None and longer is not None and longer <= start:
+            return df[df.index >= start], key
+    return None
+
+def _cached(symbol, period, interval):
+    return _cache_get((symbol, period, interval)) is not None or _cached_longer(symbol, period, interval) is not None
+
+def load(symbol, period="1y", interval="1d"):
+    # symbol/period/interval 당 한 번만 다운로드하고, 동시에 들어온 요청은 같은 다운로드를 기다린다
+    # 주봉/월봉은 같은 기간의 일봉을 load 해 리샘플링, 일봉은 캐시에 더 긴 기간이 있으면 잘라서
+    key = (symbol, period, interval)
+    with _cache_lock:
+        if key not in _fetch_locks and len(_fetch_locks) >= 2 * CACHE_MAXSIZE:
+            # 캐시에서 빠진 키의 잠금은 버린다 (period 처럼 값이 자유로운 키로 잠금이 계속 쌓이지 않게)
+            for unused in [k for k, lock in _fetch_locks.items() if k not in _frame_cache and not lock.locked()]:
+                del _fetch_locks[unused]
+        lock = _fetch_locks.setdefault(key, threading.Lock())
+        batch = _batches.get(key)
+    if batch is not None:
+        # 이 심볼을 받고 있는 묶음 다운로드는 fallback 시각까지 (None 이면 끝날 때까지) 기다린다
+        fallback_at, done = batch
+        done.wait(None if fallback_at is None else max(0.0, fallback_at - time.monotonic()))
+    with lock:
+        df = _cache_get(key)
+        if df is None:
+            if interval in RESAMPLE_RULES:
+                daily = load(symbol, period, "1d")
+                df = resample(daily, interval) if not daily.empty else daily
+                source = (symbol, period, "1d")
+            else:
+                found = _cached_longer(symbol, period, interval)
+                if found is not None:
+                    df, source = found
+                else:
+                    df = _fetch([symbol], period, interval).get(symbol, pd.DataFrame())
+                    source = None
+            if not df.empty:
+                _cache_put(key, df, None if source is None else _cache_expires(source))
+    # 얕은 복사본을 넘겨 분석기가 컬럼을 추가해도 캐시 원본은 바뀌지 않는다
+    return df.copy(deep=False)
+
+def _download_batch(symbols, period, interval="1d", fallback_at=None):
+    # 여러 심볼을 제공자 호출 한 번으로 받는다. 심볼별 잠금은 잡지 않고 받는 중인 키만 _batches 에 표시해
+    # load() 가 기다렸다 캐시에서 가져가게 한다 (다른 묶음이나 load() 가 받고 있는 심볼은 뺀다)
+    # fallback_at(time.monotonic 기준): 이 시각이 지나면 load() 는 기다리지 않고 직접 받는다 (None 이면 끝까지 기다림)
+    # 실패한 심볼은 해당 분석기가 다시 받아 보고 에러를 보고하도록 여기서는 넘어간다
+    missing = [symbol for symbol in symbols if not _cached(symbol, period, interval)]
+    done = threading.Event()
+    with _cache_lock:
+        keys = []
+        for symbol in missing:
+            key = (symbol, period, interval)
+            lock = _fetch_locks.get(key)
+            if key not in _batches and (lock is None or not lock.locked()):
+                _batches[key] = (fallback_at, done)
+                keys.append(key)
+    if not keys:
+        return
+    try:
+        for symbol, df in _fetch([symbol for symbol, *_ in keys], period, interval).items():
+            if not df.empty:
+                _cache_put((symbol, period, interval), df)
+    except Exception:
+        pass
+    finally:
+        with _cache_lock:
+            for key in keys:
+                del _batches[key]
+        done.set()
+
+def prefetch(symbols, period="1y", workers=1, timeout=None, interval="1d", shared=(), fallback_at=None):
+    # 주봉/월봉은 원본 일봉만 받아 둔다 (리샘플링은 분석기의 load 에서)
+    # shared 에 든 심볼은 따로 묶어 끝까지 기다리게 하고, 나머지 묶음은 fallback_at 이 지나면 분석기가 직접 받는다
+    interval = source_interval(interval)
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if not _cached(symbol, period, interval)]
+    batches = []
+    for group, fallback in [([s for s in symbols if s in shared], None), ([s for s in symbols if s not in shared], fallback_at)]:
+        batches += [(group[i:i + BATCH_SIZE], fallback) for i in range(0, len(group), BATCH_SIZE)]
+    if workers <= 1:
+        for batch, fallback in batches:
+            _download_batch(batch, period, interval, fallback)
+        return
+    # 공유 심볼 묶음은 timeout 까지, 나머지 묶음은 fallback_at 도 넘기지 않고 기다린다
+    # 제한 시간이 지나면 기다리지 않고 반환 (남은 다운로드는 백그라운드에서 끝나 캐시에 들어간다)
+    end = None if timeout is None else time.monotonic() + timeout
+
+    def until(*times):
+        times = [t for t in times if t is not None]
+        return None if not times else max(0.0, min(times) - time.monotonic())
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = [(pool.submit(_download_batch, batch, period, interval, fallback), fallback) for batch, fallback in batches]
+    wait([future for future, fallback in futures if fallback is None], timeout=until(end))
+    wait([future for future, fallback in futures if fallback is not None], timeout=until(end, fallback_at))
+    pool.shutdown(wait=False)
+
+def clear_cache():
+    global _cache_bytes
+    with _cache_lock:
+        _frame_cache.clear()
+        _cache_bytes = 0
+
+def set_provider(provider):
+    # 제공자를 바꾸면 이전 제공자의 프레임/지표 상태는 버린다
+    global _provider
+    _provider = provider
+    clear_cache()
+    with _states_lock:
+        _states.clear()
+
+def single_flight(key, fn, *args, **kwargs):
+    # 같은 key 로 이미 계산 중이면 새로 돌리지 않고 그 결과를 기다린다
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result()
+    try:
+        result = fn(*args, **kwargs)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+
+async def single_flight_async(key, fn, *args, **kwargs):
+    # 이벤트 루프용 single-flight: 같은 key 의 요청은 하나의 태스크를 함께 기다린다
+    # (한 요청이 취소돼도 shield 덕분에 공유 태스크는 계속 진행)
+    task = _async_inflight.get(key)
+    if task is None:
+        task = _async_inflight[key] = asyncio.ensure_future(fn(*args, **kwargs))
+        task.add_done_callback(lambda _: _async_inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+def _rsi_ema(series, length=14):
     delta = series.diff()
     up = delta.clip(lower=0)
     down = -1 * delta.clip(upper=0)
     ema_up = up.ewm(com=length-1, adjust=False).mean()
     ema_down = down.ewm(com=length-1, adjust=False).mean()
+    return ema_up, ema_down
+
+def get_rsi(series, length=14):
+    ema_up, ema_down = _rsi_ema(series, length)
     rs = ema_up / ema_down
     return 100 - (100 / (1 + rs))
 
+def slope_kernel(window):
+    # x = 0..window-1 에 대한 최소제곱 기울기 가중치 (창 안의 값과 내적하면 기울기)
+    x = np.arange(window) - (window - 1) / 2
+    return x / (x ** 2).sum()
+
+def slope_array(values, window=5):
+    # 배열의 이동 최소제곱 기울기를 합성곱 한 번으로 계산 (창 안에 NaN 이 있으면 NaN)
+    # 분석기(safe_slope, IndicatorState)와 파라미터 스윕이 모두 이것을 써서 계산이 어긋나지 않게 한다
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = np.convolve(values, slope_kernel(window)[::-1], mode='valid')
+    return out
+
 def safe_slope(series, window=5):
-    return series.rolling(window).apply(
-        lambda x: np.polyfit(range(len(x)), x, 1)[0]
-        if len(x) == window and not np.isnan(x).any()
-        else 0,
-        raw=True
-    )
-
-def analyze_btc(kst):
-    plt.switch_backend('Agg')
-    try:
-        now_str = datetime.now(kst).strftime('%Y-%m-%d %H:%M:%S')
-        dxy = flatten(yf.download("DX-Y.NYB", period="1y", progress=False))
-        tnx = flatten(yf.download("^TNX", period="1y", progress=False))
-        spx = flatten(yf.download("^GSPC", period="1y", progress=False))
-        btc = flatten(yf.download("BTC-USD", period="1y", progress=False))
+    return pd.Series(slope_array(series.to_numpy(dtype=float), window), index=series.index, name=series.name)
 
-        current_price = btc["Close"].iloc[-1]
+INDICATOR_COLUMNS = ["MA20", "MA60", "MA20_Slope", "VOL_MA20", "RSI", "VOL"]
 
-        dxy["MA20"] = dxy["Close"].rolling(20).mean()
-        dxy["MA60"] = dxy["Close"].rolling(60).mean()
-        tnx["MA20"] = tnx["Close"].rolling(20).mean()
-        spx["MA60"] = spx["Close"].rolling(60).mean()
-        spx["VOL"] = spx["Close"].pct_change().rolling(10).std()
-
-        btc["MA20"] = btc["Close"].rolling(20).mean()
-        btc["MA20_Slope"] = safe_slope(btc["MA20"], 5)
-        btc["VOL_MA20"] = btc["Volume"].rolling(20).mean()
-        btc["VOL_RATIO"] = btc["Volume"] / btc["VOL_MA20"]
-        btc["Internal_Score"] = (btc["VOL_RATIO"] > 1.3).astype(int)
-        btc["RSI"] = get_rsi(btc["Close"], 14)
-
-        results = []
-        for i in range(60, len(btc)):
-            try:
-                date = btc.index[i]
-                d_idx = dxy.index.get_indexer([date], method='pad')[0]
-                t_idx = tnx.index.get_indexer([date], method='pad')[0]
-                s_idx = spx.index.get_indexer([date], method='pad')[0]
-                dxy_s = int(dxy["MA20"].iloc[d_idx] < dxy["MA60"].iloc[d_idx] and np.polyfit(range(10), dxy["MA60"].iloc[d_idx-9:d_idx+1], 1)[0] < 0)
-                rate_s = int(tnx["MA20"].iloc[t_idx] < tnx["MA20"].iloc[t_idx-5])
-                stock_s = int(spx["Close"].iloc[s_idx] > spx["MA60"].iloc[s_idx] and spx["VOL"].iloc[s_idx] < spx["VOL"].iloc[s_idx-5])
-                results.append({"Date": date, "Score": dxy_s + rate_s + stock_s})
-            except: continue
-        df_res = pd.DataFrame(results).set_index("Date")
-
-        merge_df = pd.merge(df_res, btc[["Close", "MA20", "MA20_Slope", "Volume", "VOL_MA20", "Internal_Score", "RSI"]], left_index=True, right_index=True)
-        spx_aligned = spx["Close"].reindex(merge_df.index, method="nearest")
-        merge_df["RS"] = merge_df["Close"] / spx_aligned
-        merge_df["RS_MA20"] = merge_df["RS"].rolling(20).mean()
-        merge_df["RS_Slope"] = safe_slope(merge_df["RS"], 5)
-        merge_df["Internal_Strong"] = (merge_df["Internal_Score"].rolling(2).sum() >= 1).astype(int)
-        merge_df["Final_Strong_Signal"] = ((merge_df["Score"] >= 2) & (merge_df["Internal_Strong"] == 1) & (merge_df["MA20_Slope"] > 0)).astype(int)
-        merge_df["Sell_Signal"] = (merge_df["Score"] <= 1).astype(int)
+def batch_indicators(df):
+    # 모든 종목/매크로 프레임에 공통으로 쓰는 지표를 전체 기간에 대해 한 번에 계산
+    out = pd.DataFrame(index=df.index)
+    out["MA20"] = df["Close"].rolling(20).mean()
+    out["MA60"] = df["Close"].rolling(60).mean()
+    out["MA20_Slope"] = safe_slope(out["MA20"], 5)
+    out["VOL_MA20"] = df["Volume"].rolling(20).mean()
+    out["RSI"] = get_rsi(df["Close"], 14)
+    out["VOL"] = df["Close"].pct_change().rolling(10).std()
+    # float32 프레임(분봉)은 지표도 float32 로
+    if df["Close"].dtype == np.float32:
+        out = out.astype(np.float32)
+    return out
 
-        plot_df = merge_df.tail(20)
+def _window_mean(buf):
+    return np.mean(buf) if len(buf) == buf.maxlen else np.nan
+
+def _push(buf, value, revise):
+    if revise:
+        buf[-1] = value
+    else:
+        buf.append(value)
+
+def _ticks(index, unit):
+    # DatetimeIndex -> unit 단위 int64 (타임존이 있으면 UTC 기준). 단위가 같으면 변환 없이 그대로
+    index = pd.DatetimeIndex(index)
+    return (index if index.unit == unit else index.as_unit(unit)).asi8
+
+class IndicatorState:
+    # 한 종목의 지표를 바 하나씩 전진시키는 상태. 창 버퍼와 EWM 누적값만 갱신하므로 O(window)
+    # 이력은 (행 x [Close, Volume, 지표...]) 배열에 두고 용량이 차면 두 배로 늘린다 (분봉 수십만 행에서도 추가는 상수 시간)
+    _slope_kernel = slope_kernel(5)
+    _alpha = 1 / 14
+    _fields = ["Close", "Volume"] + INDICATOR_COLUMNS
+
+    def __init__(self, dtype=np.float64):
+        self.n = 0
+        self.tz = None
+        self.unit = "ns"
+        self._ts = np.empty(0, dtype="i8")
+        self._values = np.empty((0, len(self._fields)), dtype=dtype)
+        self._close20 = deque(maxlen=20)
+        self._close60 = deque(maxlen=60)
+        self._volume20 = deque(maxlen=20)
+        self._ma20 = deque(maxlen=5)
+        self._returns = deque(maxlen=10)
+        # (직전 바까지의 EWM, 마지막 바까지의 EWM) - 마지막 바가 수정되면 앞의 값에서 다시 계산
+        # EWM 은 (상승, 하락, 이전 값의 가중치): 가중치는 변화량이 NaN 인 바마다 (1 - alpha) 씩 줄어든다 (pandas 와 같게)
+        self._ema = [(np.nan, np.nan, 1.0), (np.nan, np.nan, 1.0)]
+
+    @classmethod
+    def from_frame(cls, df):
+        state = cls(np.float32 if df["Close"].dtype == np.float32 else np.float64)
+        batch = batch_indicators(df)
+        close = df["Close"].to_numpy(dtype=float)
+        volume = df["Volume"].to_numpy(dtype=float)
+        state.n = len(df)
+        state.tz = df.index.tz
+        state.unit = pd.DatetimeIndex(df.index).unit
+        state._ts = _ticks(df.index, state.unit).copy()
+        state._values = np.column_stack([close, volume] + [batch[col].to_numpy(dtype=float) for col in INDICATOR_COLUMNS]).astype(state._values.dtype)
+        state._close20.extend(close[-20:])
+        state._close60.extend(close[-60:])
+        state._volume20.extend(volume[-20:])
+        state._ma20.extend(batch["MA20"].to_numpy(dtype=float)[-5:])
+        state._returns.extend(df["Close"].astype(float).pct_change().to_numpy()[-10:])
+        ema_up, ema_down = _rsi_ema(df["Close"].astype(float), 14)
+        # 바마다 마지막 유효 변화량 이후 이어진 NaN 개수 -> 이전 값 가중치 (1 - alpha) ** 개수
+        rows = np.arange(len(df))
+        observed = np.maximum.accumulate(np.where(df["Close"].astype(float).diff().notna(), rows, 0))
+        weights = (1 - cls._alpha) ** (rows - observed)[-2:]
+        ema = list(zip(ema_up.to_numpy()[-2:], ema_down.to_numpy()[-2:], weights))
+        state._ema = [(np.nan, np.nan, 1.0)] * (2 - len(ema)) + ema
+        return state
+
+    def matches(self, df):
+        # df 가 지금까지 반영한 바를 그대로 포함하는지 (마지막 바는 수정될 수 있으므로 제외)
+        n = self.n
+        if n == 0 or len(df) < n or df["Close"].dtype.itemsize != self._values.dtype.itemsize:
+            return False
+        ts = _ticks(df.index[:n], self.unit)
+        dtype = self._values.dtype
+        return (
+            ts[-1] == self._ts[n - 1]
+            and np.array_equal(ts[:-1], self._ts[:n - 1])
+            and np.array_equal(df["Close"].to_numpy(dtype=dtype)[:n - 1], self._values[:n - 1, 0], equal_nan=True)
+            and np.array_equal(df["Volume"].to_numpy(dtype=dtype)[:n - 1], self._values[:n - 1, 1], equal_nan=True)
+        )
+
+    def current(self, df):
+        # matches(df) 이고 마지막 바까지 그대로인지 (새로 반영할 것이 없음)
+        n = self.n
+        last = df.iloc[n - 1:n] if len(df) == n else None
+        return last is not None and np.array_equal(
+            last[["Close", "Volume"]].to_numpy(dtype=self._values.dtype)[0], self._values[n - 1, :2], equal_nan=True
+        )
+
+    def _append(self, ts, row, revise):
+        if revise:
+            self._values[self.n - 1] = row
+            return
+        if self.n == len(self._ts):
+            capacity = self.n + max(64, self.n // 4)
+            self._ts = np.resize(self._ts, capacity)
+            self._values = np.resize(self._values, (capacity, len(self._fields)))
+        self._ts[self.n] = ts
+        self._values[self.n] = row
+        self.n += 1
+
+    def update(self, ts, close, volume):
+        ts = pd.Timestamp(ts)
+        value = int(ts.as_unit(self.unit).asm8.view("i8"))
+        last = self._ts[self.n - 1] if self.n else None
+        revise = last is not None and value == last
+        if last is not None and value < last:
+            raise ValueError(f"bar {ts} is older than the last bar")
+        prev_close = float(self._values[self.n - 2 if revise else self.n - 1, 0]) if self.n > revise else np.nan
+
+        _push(self._close20, close, revise)
+        _push(self._close60, close, revise)
+        _push(self._volume20, volume, revise)
+        ma20 = _window_mean(self._close20)
+        _push(self._ma20, ma20, revise)
+        ret = close / prev_close - 1
+        _push(self._returns, ret, revise)
+
+        # get_rsi 와 같은 adjust=False, ignore_na=False EWM: 첫 유효 변화량에서 시작하고,
+        # NaN 변화량 동안에는 값을 유지한 채 이전 값의 가중치만 줄여 다음 관측값의 비중이 커진다
+        if not revise:
+            self._ema = [self._ema[1], self._ema[1]]
+        prev_up, prev_down, weight = self._ema[0]
+        delta = close - prev_close
+        up, down = max(delta, 0.0), max(-delta, 0.0)
+        if np.isnan(prev_up):
+            ema = (np.nan, np.nan, 1.0) if np.isnan(delta) else (up, down, 1.0)
+        else:
+            weight *= 1 - self._alpha
+            if np.isnan(delta):
+                ema = (prev_up, prev_down, weight)
+            else:
+                total = weight + self._alpha
+                ema = ((weight * prev_up + self._alpha * up) / total, (weight * prev_down + self._alpha * down) / total, 1.0)
+        self._ema[1] = ema
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - 100 / (1 + np.float64(ema[0]) / ema[1])
+
+        row = {
+            "MA20": ma20,
+            "MA60": _window_mean(self._close60),
+            "MA20_Slope": float(np.dot(self._slope_kernel, self._ma20)) if len(self._ma20) == 5 else np.nan,
+            "VOL_MA20": _window_mean(self._volume20),
+            "RSI": rsi,
+            "VOL": np.std(self._returns, ddof=1) if len(self._returns) == 10 else np.nan,
+        }
+        self._append(value, [close, volume] + [row[col] for col in INDICATOR_COLUMNS], revise)
+        return row
+
+    @property
+    def nbytes(self):
+        return self._ts.nbytes + self._values.nbytes
+
+    def frame(self):
+        # 상태는 계속 바뀌므로 복사본으로
+        index = pd.DatetimeIndex(self._ts[:self.n].view(f"M8[{self.unit}]"), name="Date")
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        return pd.DataFrame(self._values[:self.n, 2:], index=index, columns=INDICATOR_COLUMNS, copy=True)
+
+# (심볼, 기간, 간격) 별 [잠금, 상태]. 프레임 캐시처럼 개수를 제한한다
+# 전역 잠금은 항목을 찾는 동안만 잡고, 지표 계산은 종목별 잠금 안에서 (다른 종목의 지표 계산과 동시에 진행)
+_states = OrderedDict()
+_states_lock = threading.Lock()
+
+def _state_entry(key):
+    with _states_lock:
+        entry = _states.get(key)
+        if entry is None:
+            entry = _states[key] = [threading.Lock(), None]
+        _states.move_to_end(key)
+        while len(_states) > CACHE_MAXSIZE:
+            _states.popitem(last=False)
+        return entry
+
+def indicators(key, df):
+    # 새로 들어온 바(와 수정된 마지막 바)만 반영하고, 이력이 달라졌으면 전체를 다시 계산
+    # 계산 중에 목록에서 밀려난 항목은 그 호출에서만 쓰이고 버려진다
+    entry = _state_entry(key)
+    with entry[0]:
+        state = entry[1]
+        if state is not None and state.matches(df):
+            # 장이 닫혀 있는 동안의 반복 요청처럼 바뀐 바가 없으면 다시 계산하지 않는다
+            # (마지막 바를 증분으로 다시 계산하면 배치 결과와 끝자리가 달라져 차트 버전이 바뀜)
+            start = len(df) if state.current(df) else state.n - 1
+            for ts, close, volume in zip(df.index[start:], df["Close"].to_numpy(dtype=float)[start:], df["Volume"].to_numpy(dtype=float)[start:]):
+                state.update(ts, close, volume)
+        else:
+            state = entry[1] = IndicatorState.from_frame(df)
+        return state.frame()
+
+def with_indicators(key, df):
+    # key: 상태를 구분하는 값 (심볼 또는 (심볼, 기간, 간격))
+    return df.join(indicators(key, df).set_axis(df.index))
+
+# 매크로 점수는 앞쪽 WARMUP_BARS 개 봉(MA60 이 아직 없는 구간)을 버리므로, 점수를 내려면 봉이 그보다 하나는 많아야 한다
+WARMUP_BARS = 60
+MIN_BARS = WARMUP_BARS + 1
+
+def require_history(frames, span):
+    # 기간이 짧아 봉이 모자라면 (예: 1mo 간격에 2y) 빈 점수표에서 IndexError 가 나기 전에 이유를 알려 준다
+    period, interval = span
+    for symbol, df in frames.items():
+        if len(df) < MIN_BARS:
+            raise ValueError(f"not enough history for {interval}: {symbol} has {len(df)} bars in {period}, "
+                             f"needs at least {MIN_BARS} (use a longer period)")
+
+def macro_score(index, parts, start=WARMUP_BARS):
+    # 각 매크로 조건(자기 인덱스 기준 bool Series)을 index 날짜에 pad(as-of) 정렬해 합산
+    index = index[start:]
+    score = np.zeros(len(index), dtype=_flag_dtype())
+    keep = np.ones(len(index), dtype=bool)
+    for part in parts:
+        pos = part.index.get_indexer(index, method='pad')
+        keep &= pos >= 0
+        score += part.to_numpy(dtype=bool)[pos]
+    return pd.DataFrame({"Score": score[keep]}, index=index[keep].rename("Date"))
+
+def btc_macro_score(btc, dxy, tnx, spx):
+    dxy_s = (dxy["MA20"] < dxy["MA60"]) & (safe_slope(dxy["MA60"], 10) < 0)
+    rate_s = tnx["MA20"] < tnx["MA20"].shift(5)
+    stock_s = (spx["Close"] > spx["MA60"]) & (spx["VOL"] < spx["VOL"].shift(5))
+    return macro_score(btc.index, [dxy_s, rate_s, stock_s])
+
+def stock_macro_score(stock, dxy, us10y, baseline):
+    dxy_s = dxy["Close"] < dxy["Close"].shift(5)
+    rate_s = us10y["Close"] < us10y["Close"].shift(5)
+    base_s = baseline["Close"] > baseline["MA60"]
+    return macro_score(stock.index, [dxy_s, rate_s, base_s])
+
+def _chart_template():
+    # 4단 차트의 축/스타일/아티스트를 한 번만 만들고, 호출마다 데이터만 바꿔 끼운다
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 8))
+    ax1, ax2, ax3, ax4 = fig.subplots(4, 1, sharex=True, gridspec_kw={"height_ratios": [3, 1, 1.2, 1]})
+    fig.patch.set_facecolor('#0f172a')
+    for ax in [ax1, ax2, ax3, ax4]:
+        ax.set_facecolor('#0f172a')
+        ax.tick_params(colors='white')
+        for spine in ax.spines.values():
+            spine.set_color('#334155')
+    ax4.xaxis_date()
+    ax4.tick_params(axis='x', labelrotation=30)
+
+    chart = {"fig": fig, "axes": (ax1, ax2, ax3, ax4), "bars": []}
+    chart["close"], = ax1.plot([], [], marker="o", linewidth=2, color='#38bdf8')
+    chart["ma20"], = ax1.plot([], [], "--", alpha=0.6, color='#94a3b8')
+    chart["buy"] = ax1.scatter([], [], color="#f43f5e", s=100, marker="^")
+    chart["sell"] = ax1.scatter([], [], color="#10b981", s=100, marker="v")
+    ax1b = chart["ax1b"] = ax1.twinx()
+    chart["score"], = ax1b.plot([], [], color="#f43f5e", linewidth=4, drawstyle="steps-mid", alpha=0.3)
+
+    chart["vol_ma20"], = ax2.plot([], [], ":", color="white", alpha=0.5)
+
+    chart["rs"] = LineCollection([], linewidths=2)
+    ax3.add_collection(chart["rs"])
+    # 컬렉션은 relim 대상이 아니므로 축 범위 계산용으로 보이지 않는 RS 선을 둔다
+    chart["rs_limits"], = ax3.plot([], [], visible=False)
+    chart["rs_ma20"], = ax3.plot([], [], "#f59e0b", linestyle="--")
 
-        fig, (ax1, ax2, ax3, ax4) = plt.subplots(4, 1, figsize=(10, 8), sharex=True, gridspec_kw={"height_ratios": [3, 1, 1.2, 1]})
-        plt.style.use('dark_background')
-        fig.patch.set_facecolor('#0f172a')
-        for ax in [ax1, ax2, ax3, ax4]:
-            ax.set_facecolor('#0f172a')
-            ax.tick_params(colors='white')
-            for spine in ax.spines.values():
-                spine.set_color('#334155')
-
-        ax1.plot(plot_df.index, plot_df["Close"], marker="o", linewidth=2, color='#38bdf8')
-        ax1.plot(plot_df.index, plot_df["MA20"], "--", alpha=0.6, color='#94a3b8')
-        ax1b = ax1.twinx()
-        ax1b.plot(plot_df.index, plot_df["Score"], color="#f43f5e", linewidth=4, drawstyle="steps-mid", alpha=0.3)
-        ax1b.set_ylim(0, 4)
-        for idx, row in plot_df[plot_df["Final_Strong_Signal"] == 1].iterrows():
-            ax1.scatter(idx, row["Close"] * 0.96, color="#f43f5e", s=100, marker="^")
-        for idx, row in plot_df[plot_df["Sell_Signal"] == 1].iterrows():
-            ax1.scatter(idx, row["Close"] * 1.04, color="#10b981", s=100, marker="v")
-
-        vol_colors = ["#f43f5e" if v > m else "#475569" for v, m in zip(plot_df["Volume"], plot_df["VOL_MA20"])]
-        ax2.bar(plot_df.index, plot_df["Volume"], color=vol_colors, alpha=0.6)
-        ax2.plot(plot_df.index, plot_df["VOL_MA20"], ":", color="white", alpha=0.5)
-
-        for i in range(len(plot_df)-1):
-            c = "#10b981" if plot_df["RS_Slope"].iloc[i+1] > 0 else "#f43f5e"
-            ax3.plot(plot_df.index[i:i+2], plot_df["RS"].iloc[i:i+2], color=c, linewidth=2)
-        ax3.plot(plot_df.index, plot_df["RS_MA20"], "#f59e0b", linestyle="--")
-
-        ax4.plot(plot_df.index, plot_df["RSI"], color="#a855f7")
-        ax4.axhline(30, color="#f43f5e", ls="--", alpha=0.5)
-        ax4.axhline(70, color="#10b981", ls="--", alpha=0.5)
-        ax4.axhline(50, color="#38bdf8", ls=":", alpha=0.8)
-
-        plt.suptitle(f"BTC-USD Analysis - {now_str}", color='white', fontsize=12)
-        plt.xticks(rotation=30)
-        plt.tight_layout()
+    chart["rsi"], = ax4.plot([], [], color="#a855f7")
+    ax4.axhline(30, color="#f43f5e", ls="--", alpha=0.5)
+    ax4.axhline(70, color="#10b981", ls="--", alpha=0.5)
+    ax4.axhline(50, color="#38bdf8", ls=":", alpha=0.8)
 
+    chart["title"] = fig.suptitle("", color='white', fontsize=12)
+    return chart
+
+def render_chart(plot_df, title, buy_col, sell_col, score_max):
+    import matplotlib.dates as mdates
+    import matplotlib.style as mplstyle
+
+    global _chart
+    x = mdates.date2num(plot_df.index)
+    close = plot_df["Close"].to_numpy(dtype=float)
+    volume = plot_df["Volume"].to_numpy(dtype=float)
+    vol_ma20 = plot_df["VOL_MA20"].to_numpy(dtype=float)
+    rs = plot_df["RS"].to_numpy(dtype=float)
+    buy = plot_df[buy_col].to_numpy() == 1
+    sell = plot_df[sell_col].to_numpy() == 1
+
+    with _plot_lock, mplstyle.context('dark_background'):
+        if _chart is None:
+            _chart = _chart_template()
+        chart = _chart
+        ax1, ax2, ax3, ax4 = chart["axes"]
+
+        chart["close"].set_data(x, close)
+        chart["ma20"].set_data(x, plot_df["MA20"])
+        chart["score"].set_data(x, plot_df["Score"])
+        chart["ax1b"].set_ylim(0, score_max)
+        chart["buy"].set_offsets(np.column_stack([x[buy], close[buy] * 0.96]))
+        chart["sell"].set_offsets(np.column_stack([x[sell], close[sell] * 1.04]))
+
+        vol_colors = np.where(volume > vol_ma20, "#f43f5e", "#475569")
+        # 막대 폭은 바 간격 기준 (일봉 0.8일, 분봉이면 그만큼 좁게)
+        width = 0.8 * np.diff(x).min() if len(x) > 1 else 0.8
+        if len(chart["bars"]) == len(x):
+            for bar, xi, v, c in zip(chart["bars"], x, volume, vol_colors):
+                bar.set_width(width)
+                bar.set_x(xi - width / 2)
+                bar.set_height(v)
+                bar.set_color(c)
+        else:
+            for bar in chart["bars"]:
+                bar.remove()
+            chart["bars"] = list(ax2.bar(x, volume, width=width, color=vol_colors, alpha=0.6))
+        chart["vol_ma20"].set_data(x, vol_ma20)
+
+        points = np.column_stack([x, rs])
+        chart["rs"].set_segments(np.stack([points[:-1], points[1:]], axis=1))
+        chart["rs"].set_color(np.where(plot_df["RS_Slope"].to_numpy()[1:] > 0, "#10b981", "#f43f5e"))
+        chart["rs_limits"].set_data(x, rs)
+        chart["rs_ma20"].set_data(x, plot_df["RS_MA20"])
+
+        chart["rsi"].set_data(x, plot_df["RSI"])
+        chart["title"].set_text(title)
+
+        for ax in (ax1, chart["ax1b"], ax2, ax3, ax4):
+            ax.relim()
+        # 신호 마커도 원래처럼 가격축 범위에 포함
+        ax1.update_datalim(np.vstack([chart["buy"].get_offsets(), chart["sell"].get_offsets()]))
+        for ax in (ax1, ax2, ax3, ax4):
+            ax.autoscale_view()
+
+        fig = chart["fig"]
+        fig.tight_layout()
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', transparent=False)
-        buf.seek(0)
-        img_str = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
+        fig.savefig(buf, format='png', bbox_inches='tight', transparent=False)
+        return buf.getvalue()
+
+def warm_charts():
+    # 차트 템플릿을 만들어 빈 그림을 한 번 그려 둔다 (matplotlib 임포트, 폰트 목록/글꼴 로딩을 첫 요청 전에 끝냄)
+    import matplotlib.style as mplstyle
+
+    global _chart
+    with _plot_lock, mplstyle.context('dark_background'):
+        if _chart is None:
+            _chart = _chart_template()
+        _chart["fig"].savefig(io.BytesIO(), format="png")
+
+def chart_version(plot_df, title):
+    # 차트에 그려지는 데이터와 제목이 같으면 같은 버전 (ETag 로도 사용 - 같은 버전은 다시 그려도 같은 PNG)
+    digest = hashlib.sha1(pd.util.hash_pandas_object(plot_df).to_numpy().tobytes())
+    digest.update(title.encode())
+    return digest.hexdigest()[:16]
+
+def store_chart(key, version, png):
+    with _charts_lock:
+        _charts[(key, version)] = png
+        _charts.move_to_end((key, version))
+        while len(_charts) > CHART_CACHE_MAXSIZE:
+            _charts.popitem(last=False)
+
+def clear_charts():
+    # 저장된 PNG 와 차트 템플릿을 버린다 (다음 요청은 Figure 생성부터 다시)
+    global _chart
+    with _charts_lock:
+        _charts.clear()
+    with _plot_lock:
+        _chart = None
+
+def get_chart(key, version):
+    with _charts_lock:
+        png = _charts.get((key, version))
+        if png is not None:
+            _charts.move_to_end((key, version))
+        return png
+
+def chart_url(key, plot_df, title, buy_col, sell_col, score_max, span):
+    # 같은 데이터 버전의 차트가 이미 있으면 다시 그리지 않는다
+    # URL 은 /analyze 기준 상대 경로 (클라이언트가 API 주소에 맞춰 해석). 다시 그릴 때 쓰도록 봉 간격/기간을 붙인다
+    version = chart_version(plot_df, title)
+    if get_chart(key, version) is None:
+        store_chart(key, version, render_chart(plot_df, title, buy_col, sell_col, score_max))
+    period, interval = span
+    return f"chart/{quote(key, safe='')}/{version}.png?{urlencode({'interval': interval, 'period': period})}"
+
+def _flag_dtype():
+    # 신호/점수 컬럼 (0/1, 0~3)
+    return np.int8 if COMPACT_FRAMES else int
+
+def merge_rs(df_res, frame, columns, base_close, method):
+    # 매크로 점수와 종목 지표를 합치고 기준 지수 대비 상대강도(RS)를 붙인다
+    # 점수 날짜 중 종목 프레임에 있는 행만, 필요한 컬럼만 골라 담는다 (전체 프레임 복사 + merge 복사 없이)
+    flag = _flag_dtype()
+    rows = frame.index.get_indexer(df_res.index)
+    keep = rows >= 0
+    rows = rows[keep]
+    merge_df = df_res[keep]
+    for col in columns:
+        if col == "Internal_Score":
+            ratio = frame["Volume"].to_numpy()[rows] / frame["VOL_MA20"].to_numpy()[rows]
+            merge_df[col] = (ratio > 1.3).astype(flag)
+        else:
+            merge_df[col] = frame[col].to_numpy()[rows]
+    base_aligned = base_close.reindex(merge_df.index, method=method)
+    merge_df["RS"] = merge_df["Close"] / base_aligned
+    merge_df["RS_MA20"] = merge_df["RS"].rolling(20).mean()
+    merge_df["RS_Slope"] = safe_slope(merge_df["RS"], 5)
+    merge_df["Internal_Strong"] = (merge_df["Internal_Score"].rolling(2).sum() >= 1).astype(flag)
+    return merge_df
+
+def btc_signals(btc, dxy, tnx, spx):
+    # 지표가 붙은 프레임들로 BTC 신호 프레임(merge_df)을 만든다
+    df_res = btc_macro_score(btc, dxy, tnx, spx)
+    merge_df = merge_rs(df_res, btc, ["Close", "MA20", "MA20_Slope", "Volume", "VOL_MA20", "Internal_Score", "RSI"], spx["Close"], "nearest")
+    flag = _flag_dtype()
+    merge_df["Final_Strong_Signal"] = ((merge_df["Score"] >= 2) & (merge_df["Internal_Strong"] == 1) & (merge_df["MA20_Slope"] > 0)).astype(flag)
+    merge_df["Sell_Signal"] = (merge_df["Score"] <= 1).astype(flag)
+    return merge_df
+
+def stock_signals(stock, dxy, us10y, baseline):
+    df_res = stock_macro_score(stock, dxy, us10y, baseline)
+    merge_df = merge_rs(df_res, stock, ["Close", "MA20", "MA60", "MA20_Slope", "Volume", "VOL_MA20", "Internal_Score", "RSI"], baseline["Close"], "ffill")
+    flag = _flag_dtype()
+    merge_df["Final_Buy"] = ((merge_df["Score"] >= 2) & (merge_df["MA20_Slope"] > 0) & (merge_df["Internal_Strong"] == 1)).astype(flag)
+    merge_df["Sell"] = ((merge_df["Score"] <= 1) & (merge_df["MA20_Slope"] < 0)).astype(flag)
+    return merge_df
+
+SERIES_COLUMNS = ["Close", "MA20", "Score", "Volume", "VOL_MA20", "RS", "RS_MA20", "RS_Slope", "RSI"]
+
+def plot_series(plot_df, buy_col, sell_col):
+    # 클라이언트가 직접 그릴 수 있도록 차트 구간을 컬럼별 배열로 (JSON 에 NaN 이 없도록 None 으로)
+    series = {"index": [ts.isoformat() for ts in plot_df.index]}
+    for col in SERIES_COLUMNS:
+        series[col] = [None if np.isnan(v) else v for v in plot_df[col].to_numpy(dtype=float).tolist()]
+    series["buy"] = plot_df[buy_col].astype(int).tolist()
+    series["sell"] = plot_df[sell_col].astype(int).tolist()
+    return series
+
+def _error_result(name, e, timer):
+    # 실패한 종목도 결과 목록에 남기고, 어느 단계에서 어떤 예외였는지 지표용으로 함께 기록
+    return {"name": name, "error": str(e), "error_type": type(e).__name__,
+            "stage": timer.current or "unknown", "timings": timer.timings}
+
+def check_period(period):
+    # 너무 긴 기간은 분석 전에 거절한다 (API 는 422)
+    years = period_years(period)
+    if years is not None and years > MAX_PERIOD_YEARS:
+        raise ValueError(f"period too long: {period} (at most {MAX_PERIOD_YEARS}y)")
+    return period
+
+def _span(interval, period):
+    if interval not in INTERVALS:
+        raise ValueError(f"unsupported interval: {interval}")
+    return check_period(period or DEFAULT_PERIODS[interval]), interval
+
+def _title(label, interval, last):
+    # 그린 시각 대신 마지막 봉 시각 (분석 시각은 응답의 time 에 있고, 제목이 데이터로만 정해져야 다시 그려도 같은 그림)
+    stamp = last.strftime("%Y-%m-%d" if interval in ("1d", "1wk", "1mo") else "%Y-%m-%d %H:%M")
+    return f"{label} Analysis - {stamp}" if interval == "1d" else f"{label} {interval} Analysis - {stamp}"
+
+def _analyze_btc(kst, mode="png", interval="1d", period=None):
+    # 단계: download(load) / indicators / scoring(매크로 점수 + RS 병합) / render(PNG) 또는 series
+    # interval 이 분봉이면 매크로 지표도 같은 간격의 봉으로 계산 (창 길이는 봉 개수)
+    timer = StageTimer()
+    try:
+        span = _span(interval, period)
+        with timer.stage("download"):
+            dxy, tnx, spx, btc = (load(symbol, *span) for symbol in ["DX-Y.NYB", "^TNX", "^GSPC", "BTC-USD"])
+            require_history({"BTC-USD": btc, "DX-Y.NYB": dxy, "^TNX": tnx, "^GSPC": spx}, span)
+        with timer.stage("indicators"):
+            dxy = with_indicators(("DX-Y.NYB", *span), dxy)
+            tnx = with_indicators(("^TNX", *span), tnx)
+            spx = with_indicators(("^GSPC", *span), spx)
+            btc = with_indicators(("BTC-USD", *span), btc)
+
+        current_price = btc["Close"].iloc[-1]
+        with timer.stage("scoring"):
+            merge_df = btc_signals(btc, dxy, tnx, spx)
+
+        plot_df = merge_df.tail(20)
+
+        if mode == "series":
+            with timer.stage("series"):
+                view = {"series": plot_series(plot_df, "Final_Strong_Signal", "Sell_Signal")}
+        else:
+            with timer.stage("render"):
+                view = {"chart": chart_url("BTC-USD", plot_df, _title("BTC-USD", interval, plot_df.index[-1]), "Final_Strong_Signal", "Sell_Signal", 4, span)}
 
         return {
             "name": "Bitcoin (BTC-USD)",
             "price": float(current_price),
             "score": int(merge_df["Score"].iloc[-1]),
-            "chart": f"data:image/png;base64,{img_str}",
-            "unit": "USD"
+            **view,
+            "unit": "USD",
+            "timings": timer.timings
         }
     except Exception as e:
-        return {"name": "BTC", "error": str(e)}
+        return _error_result("BTC", e, timer)
 
-def analyze_stock(ticker, name, baseline_ticker, kst):
-    plt.switch_backend('Agg')
+def _analyze_stock(ticker, name, baseline_ticker, kst, mode="png", interval="1d", period=None):
+    timer = StageTimer()
     try:
-        now_str = datetime.now(kst).strftime('%Y-%m-%d %H:%M:%S')
-        stock = flatten(yf.download(ticker, period="1y", progress=False))
-        baseline = flatten(yf.download(baseline_ticker, period="1y", progress=False))
-        dxy = flatten(yf.download("DX-Y.NYB", period="1y", progress=False))
-        us10y = flatten(yf.download("^TNX", period="1y", progress=False))
+        span = _span(interval, period)
+        with timer.stage("download"):
+            stock, baseline, dxy, us10y = (load(symbol, *span) for symbol in [ticker, baseline_ticker, "DX-Y.NYB", "^TNX"])
+            require_history({ticker: stock, baseline_ticker: baseline, "DX-Y.NYB": dxy, "^TNX": us10y}, span)
+        with timer.stage("indicators"):
+            stock = with_indicators((ticker, *span), stock)
+            baseline = with_indicators((baseline_ticker, *span), baseline)
 
         current_price = stock["Close"].iloc[-1]
-
-        stock["MA20"] = stock["Close"].rolling(20).mean()
-        stock["MA60"] = stock["Close"].rolling(60).mean()
-        stock["MA20_Slope"] = safe_slope(stock["MA20"], 5)
-        stock["VOL_MA20"] = stock["Volume"].rolling(20).mean()
-        stock["VOL_RATIO"] = stock["Volume"] / stock["VOL_MA20"]
-        stock["Internal_Score"] = (stock["VOL_RATIO"] > 1.3).astype(int)
-        stock["RSI"] = get_rsi(stock["Close"], 14)
-
-        baseline["MA60"] = baseline["Close"].rolling(60).mean()
-
-        results = []
-        for i in range(60, len(stock)):
-            try:
-                date = stock.index[i]
-                d_idx = dxy.index.get_indexer([date], method='pad')[0]
-                u_idx = us10y.index.get_indexer([date], method='pad')[0]
-                b_idx = baseline.index.get_indexer([date], method='pad')[0]
-                
-                dxy_s = int(dxy["Close"].iloc[d_idx] < dxy["Close"].iloc[d_idx-5])
-                rate_s = int(us10y["Close"].iloc[u_idx] < us10y["Close"].iloc[u_idx-5])
-                base_s = int(baseline["Close"].iloc[b_idx] > baseline["MA60"].iloc[b_idx])
-                results.append({"Date": date, "Score": dxy_s + rate_s + base_s})
-            except: continue
-        df_res = pd.DataFrame(results).set_index("Date")
-
-        merge_df = pd.merge(df_res, stock[["Close", "MA20", "MA60", "MA20_Slope", "Volume", "VOL_MA20", "Internal_Score", "RSI"]], left_index=True, right_index=True)
-        base_aligned = baseline["Close"].reindex(merge_df.index, method="ffill")
-        merge_df["RS"] = merge_df["Close"] / base_aligned
-        merge_df["RS_MA20"] = merge_df["RS"].rolling(20).mean()
-        merge_df["RS_Slope"] = safe_slope(merge_df["RS"], 5)
-        merge_df["Internal_Strong"] = (merge_df["Internal_Score"].rolling(2).sum() >= 1).astype(int)
-        merge_df["Final_Buy"] = ((merge_df["Score"] >= 2) & (merge_df["MA20_Slope"] > 0) & (merge_df["Internal_Strong"] == 1)).astype(int)
-        merge_df["Sell"] = ((merge_df["Score"] <= 1) & (merge_df["MA20_Slope"] < 0)).astype(int)
+        with timer.stage("scoring"):
+            merge_df = stock_signals(stock, dxy, us10y, baseline)
 
         plot_df = merge_df.tail(20)
 
-        fig, (ax1, ax2, ax3, ax4) = plt.subplots(4, 1, figsize=(10, 8), sharex=True, gridspec_kw={"height_ratios": [3, 1, 1.2, 1]})
-        plt.style.use('dark_background')
-        fig.patch.set_facecolor('#0f172a')
-        for ax in [ax1, ax2, ax3, ax4]:
-            ax.set_facecolor('#0f172a')
-            ax.tick_params(colors='white')
-            for spine in ax.spines.values():
-                spine.set_color('#334155')
-
-        ax1.plot(plot_df.index, plot_df["Close"], marker="o", linewidth=2, color='#38bdf8')
-        ax1.plot(plot_df.index, plot_df["MA20"], "--", alpha=0.6, color='#94a3b8')
-        ax1b = ax1.twinx()
-        ax1b.plot(plot_df.index, plot_df["Score"], color="#f43f5e", linewidth=4, drawstyle="steps-mid", alpha=0.3)
-        ax1b.set_ylim(0, 3.5)
-        for idx, row in plot_df[plot_df["Final_Buy"] == 1].iterrows():
-            ax1.scatter(idx, row["Close"] * 0.96, color="#f43f5e", s=100, marker="^")
-        for idx, row in plot_df[plot_df["Sell"] == 1].iterrows():
-            ax1.scatter(idx, row["Close"] * 1.04, color="#10b981", s=100, marker="v")
-
-        vol_colors = ["#f43f5e" if v > m else "#475569" for v, m in zip(plot_df["Volume"], plot_df["VOL_MA20"])]
-        ax2.bar(plot_df.index, plot_df["Volume"], color=vol_colors, alpha=0.6)
-        ax2.plot(plot_df.index, plot_df["VOL_MA20"], ":", color="white", alpha=0.5)
-
-        for i in range(len(plot_df)-1):
-            c = "#10b981" if plot_df["RS_Slope"].iloc[i+1] > 0 else "#f43f5e"
-            ax3.plot(plot_df.index[i:i+2], plot_df["RS"].iloc[i:i+2], color=c, linewidth=2)
-        ax3.plot(plot_df.index, plot_df["RS_MA20"], "#f59e0b", linestyle="--")
-
-        ax4.plot(plot_df.index, plot_df["RSI"], color="#a855f7")
-        ax4.axhline(30, color="#f43f5e", ls="--", alpha=0.5)
-        ax4.axhline(70, color="#10b981", ls="--", alpha=0.5)
-        ax4.axhline(50, color="#38bdf8", ls=":", alpha=0.8)
-
-        plt.suptitle(f"{name} ({ticker}) Analysis - {now_str}", color='white', fontsize=12)
-        plt.xticks(rotation=30)
-        plt.tight_layout()
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', transparent=False)
-        buf.seek(0)
-        img_str = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
+        if mode == "series":
+            with timer.stage("series"):
+                view = {"series": plot_series(plot_df, "Final_Buy", "Sell")}
+        else:
+            with timer.stage("render"):
+                view = {"chart": chart_url(ticker, plot_df, _title(f"{name} ({ticker})", interval, plot_df.index[-1]), "Final_Buy", "Sell", 3.5, span)}
 
         return {
             "name": f"{name} ({ticker})",
             "price": float(current_price),
             "score": int(merge_df["Score"].iloc[-1]),
-            "chart": f"data:image/png;base64,{img_str}",
-            "unit": "KRW"
+            **view,
+            "unit": currency(ticker),
+            "timings": timer.timings
         }
     except Exception as e:
-        return {"name": ticker, "error": str(e)}
+        return _error_result(ticker, e, timer)
+
+def analyze_btc(kst, mode="png", interval="1d", period=None):
+    return single_flight(("BTC-USD", mode, interval, period), _analyze_btc, kst, mode, interval, period)
+
+def analyze_stock(ticker, name, baseline_ticker, kst, mode="png", interval="1d", period=None):
+    return single_flight((ticker, name, baseline_ticker, mode, interval, period), _analyze_stock, ticker, name, baseline_ticker, kst, mode, interval, period)
+
+def _run_in_worker(frames, fn, args, provider):
+    # 프로세스 풀 워커: 부모가 받아 둔 프레임으로 캐시를 채운 뒤 분석기 실행 (재다운로드 없음)
+    # 부모가 아직 받지 못한 프레임은 부모와 같은 제공자로 워커가 직접 받는다
+    # 워커에서 새로 그린 차트는 결과와 함께 부모로 돌려보내 부모의 차트 저장소에 넣는다
+    global _provider
+    _provider = provider
+    for key, df in frames.items():
+        _cache_put(key, df)
+    with _charts_lock:
+        before = set(_charts)
+    result = fn(*args)
+    with _charts_lock:
+        charts = {key: png for key, png in _charts.items() if key not in before}
+    return result, charts
+
+def _get_process_pool():
+    # 워커는 pandas/분석 모듈을 미리 임포트해 둔 forkserver 에서 갈라져 나오므로 새로 띄워도 임포트 비용이 없다
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=_process_context())
+        return _process_pool
+
+def _process_context():
+    context = multiprocessing.get_context(PROCESS_START_METHOD)
+    if PROCESS_START_METHOD == "forkserver":
+        context.set_forkserver_preload([__name__])
+    return context
+
+def _discard_process_pool(pool):
+    # 워커가 죽어(OOM 등) 깨진 풀은 다시 쓸 수 없으므로 버린다. 다음 _get_process_pool() 이 새 풀을 띄운다
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _submit_to_pool(fn, *args):
+    # (풀, future). 풀이 이미 깨져 있으면 새 풀로 한 번 더, 그래도 안 되면 그 예외를 담은 future
+    for attempt in range(2):
+        pool = _get_process_pool()
+        try:
+            return pool, pool.submit(fn, *args)
+        except BrokenProcessPool as e:
+            _discard_process_pool(pool)
+            error = e
+    future = Future()
+    future.set_exception(error)
+    return None, future
+
+def shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def run_isolated(fn, *args, **kwargs):
+    # 새 프로세스 하나에서 fn 실행: 프레임 캐시/지표 상태/차트 템플릿이 모두 빈 채로 시작하고 이 프로세스의 것은 건드리지 않는다
+    # 그 프로세스에서 그린 차트는 이 프로세스의 차트 저장소로 옮긴다 (결과의 차트 URL 이 그대로 유효)
+    with ProcessPoolExecutor(max_workers=1, mp_context=_process_context()) as pool:
+        result, charts = pool.submit(_run_in_worker, {}, partial(fn, **kwargs), args, _provider).result()
+    for (key, version), png in charts.items():
+        store_chart(key, version, png)
+    return result
+
+def run_jobs(jobs, executor=None, workers=None, timeout=None, timer=None, interval="1d", period=None, on_result=None):
+    # jobs: [(티커, 분석 함수, 인자, 필요한 심볼)] - 결과는 jobs 순서 그대로, 실패는 해당 항목에만 기록
+    # timeout(초)이 지나도 끝나지 않은 항목은 "timeout" 에러로 채워 부분 결과를 돌려준다 (sequential 제외)
+    # 각 결과의 단계별 시간/에러는 여기(부모 프로세스)에서 티커 라벨로 지표에 기록한다
+    # on_result(순번, 결과): 끝나는 순서대로 바로 호출 (느린 종목이 앞의 빠른 종목을 붙잡지 않게)
+    executor = executor or EXECUTOR
+    timer = timer or StageTimer()
+    period, interval = _span(interval, period)
+    workers = workers or MAX_WORKERS
+    deadline = None if timeout is None else time.monotonic() + timeout
+    # 종목 고유 심볼의 묶음이 늦으면 분석기가 직접 받기 시작하는 시각 (제한 시간이 없으면 끝까지 기다림)
+    fallback_at = None if timeout is None else time.monotonic() + timeout * BATCH_FALLBACK
+    # 분석기들이 공유하는 심볼(DXY/TNX/기준 지수)은 한 번만, 여러 심볼씩 묶어서 받아 둔다
+    symbols = [symbol for *_, job_symbols in jobs for symbol in job_symbols]
+    counts = Counter(symbols)
+    shared = {symbol for symbol, count in counts.items() if count > 1}
+    if on_result is not None:
+        # 스트리밍은 첫 결과가 중요하므로 여러 분석기가 같이 쓰는 심볼만 묶어 받고,
+        # 종목 고유 심볼은 각 분석기가 따로 받는다 (느린 종목 하나가 묶음 전체를 붙잡지 않게)
+        symbols = [symbol for symbol in symbols if symbol in shared]
+    # process 모드에서 각 future 를 받은 풀 (워커가 죽어 깨지면 그 풀을 버린다)
+    pools = {}
+    if executor == "sequential":
+        with timer.stage("prefetch"):
+            prefetch(symbols, period, interval=interval)
+        futures = None
+    else:
+        # thread 모드는 다운로드를 기다리지 않고 바로 분석을 시작한다 (load 가 진행 중인 다운로드를 기다림)
+        # process 모드는 워커가 부모의 다운로드를 볼 수 없으므로 공유 심볼은 제한 시간까지, 나머지는 fallback 시각까지
+        # 기다리고, 그때까지 못 받은 프레임만 워커가 직접 받는다
+        with timer.stage("prefetch"):
+            wait_for = 0 if executor == "thread" else None if deadline is None else max(0.0, deadline - time.monotonic())
+            prefetch(symbols, period, workers, wait_for, interval, shared, fallback_at)
+        if executor == "process":
+            futures = []
+            for _, fn, args, job_symbols in jobs:
+                # 워커에는 그 분석기가 쓰는 프레임만 넘긴다
+                keys = [(symbol, period, source_interval(interval)) for symbol in job_symbols]
+                frames = {key: df for key in keys if (df := _cache_get(key)) is not None}
+                pool, future = _submit_to_pool(_run_in_worker, frames, fn, args, _provider)
+                pools[future] = pool
+                futures.append(future)
+        elif executor == "thread":
+            pool = ThreadPoolExecutor(max_workers=workers)
+            futures = [pool.submit(fn, *args) for _, fn, args, _ in jobs]
+            pool.shutdown(wait=False)
+        else:
+            raise ValueError(f"unknown executor: {executor}")
+
+    results = [None] * len(jobs)
+
+    def finish(i, result):
+        results[i] = result
+        record(jobs[i][0], result)
+        if on_result is not None:
+            on_result(i, result)
+
+    if futures is None:
+        for i, (name, fn, args, _) in enumerate(jobs):
+            try:
+                result = fn(*args)
+            except Exception as e:
+                result = {"name": name, "error": str(e), "error_type": type(e).__name__, "stage": "worker"}
+            finish(i, result)
+    else:
+        index = {future: i for i, future in enumerate(futures)}
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        try:
+            for future in as_completed(futures, timeout=remaining):
+                i = index[future]
+                try:
+                    result = future.result()
+                    if executor == "process":
+                        result, charts = result
+                        for (key, version), png in charts.items():
+                            store_chart(key, version, png)
+                except Exception as e:
+                    # 워커가 죽으면 그 풀에 있던 항목만 실패로 남기고, 풀은 버려 다음 분석은 새 풀에서 돈다
+                    if isinstance(e, BrokenProcessPool) and pools.get(future) is not None:
+                        _discard_process_pool(pools[future])
+                    result = {"name": jobs[i][0], "error": str(e), "error_type": type(e).__name__, "stage": "worker"}
+                finish(i, result)
+        except FutureTimeoutError:
+            pass
+        for i, (name, *_) in enumerate(jobs):
+            if results[i] is None:
+                finish(i, {"name": name, "error": "timeout", "error_type": "Timeout", "stage": "timeout"})
+    record("all", {"timings": timer.timings})
+    return results
+
+def currency(ticker):
+    return "KRW" if ticker.endswith((".KS", ".KQ")) else "USD"
+
+def default_baseline(ticker):
+    # None 은 BTC 분석기
+    if ticker == "BTC-USD":
+        return None
+    if ticker.endswith(".KS"):
+        return "^KS11"
+    if ticker.endswith(".KQ"):
+        return "^KQ11"
+    return "^GSPC"
+
+def _baseline(ticker, value):
+    # csv 의 baseline 칸: 비어 있으면 시장별 기본, "none" 이면 BTC 분석기 (BTC-USD 만)
+    value = (value or "").strip()
+    if not value:
+        return default_baseline(ticker)
+    if value.lower() == "none":
+        if ticker != "BTC-USD":
+            raise ValueError(f"{ticker}: baseline 없이(BTC 분석기) 분석할 수 있는 종목은 BTC-USD 뿐입니다")
+        return None
+    return value
+
+def load_watchlist(path=None):
+    path = path or WATCHLIST_FILE
+    if not os.path.exists(path):
+        return list(WATCHLIST)
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (row["ticker"], row.get("name") or row["ticker"], _baseline(row["ticker"], row.get("baseline")))
+            for row in csv.DictReader(f) if row.get("ticker")
+        ]
 
-def run_analysis():
+def watchlist_jobs(watchlist, kst, mode="png", interval="1d", period=None):
+    jobs = []
+    for ticker, name, baseline in watchlist:
+        if baseline is None:
+            jobs.append((ticker, analyze_btc, (kst, mode, interval, period), MACRO_SYMBOLS + ["^GSPC", ticker]))
+        else:
+            jobs.append((ticker, analyze_stock, (ticker, name, baseline, kst, mode, interval, period), MACRO_SYMBOLS + [baseline, ticker]))
+    return jobs
+
+def chart_png(ticker, version, interval="1d", period=None):
+    # /chart 요청 -> (버전, PNG). 저장소에 없으면 관심 종목의 ticker 를 같은 조건으로 다시 분석해 그린다
+    # (스냅샷이 차트보다 오래 남았거나, 다른 인스턴스가 만든 URL). 그사이 시세가 바뀌어 같은 버전을 만들 수 없으면
+    # 지금 버전을 돌려주고, 관심 종목이 아니거나 분석에 실패하면 (None, None)
+    png = get_chart(ticker, version)
+    if png is not None:
+        return version, png
+    entry = next((row for row in load_watchlist() if row[0] == ticker), None)
+    if entry is None:
+        return None, None
+    _, name, baseline = entry
+    kst = timezone(timedelta(hours=9))
+    with analysis_slot():
+        if baseline is None:
+            result = analyze_btc(kst, "png", interval, period)
+        else:
+            result = analyze_stock(ticker, name, baseline, kst, "png", interval, period)
+    if "error" in result:
+        return None, None
+    current = result["chart"].split("?")[0].rsplit("/", 1)[-1].removesuffix(".png")
+    png = get_chart(ticker, current)
+    return (current, png) if png is not None else (None, None)
+
+def run_analysis(executor=None, timeout=None, mode="png", page=1, page_size=None, watchlist=None, interval="1d", period=None,
+                 emit=None):
+    # mode: "png" 는 서버에서 그린 차트 URL, "series" 는 matplotlib 없이 차트 구간 데이터만 반환
+    # 관심 종목 중 page 에 해당하는 종목만 분석한다 (page 는 1부터)
+    # interval: 봉 간격(INTERVALS), period: 기간 (없으면 간격별 DEFAULT_PERIODS)
+    # emit(event, data): 스트리밍용. 시작할 때 "start"(페이지 정보), 종목이 끝날 때마다 "result"({index, result})
     kst = timezone(timedelta(hours=9))
-    results = []
-    
-    # 1. BTC Analysis
-    results.append(analyze_btc(kst))
-    
-    # 2. LG Electronics Analysis
-    results.append(analyze_stock("066570.KS", "LG전자", "^KS11", kst))
-    
-    # 3. Samsung Electronics Analysis (User mentioned SM_Check but the file content says Samsung)
-    # The file SM_Check.py has "▶ 삼성전자 매크로 통합 분석 시작" and ticker "005930.KS"
-    results.append(analyze_stock("005930.KS", "삼성전자", "^KS11", kst))
-    
+    watchlist = load_watchlist() if watchlist is None else watchlist
+    page_size = page_size or PAGE_SIZE
+    selected = watchlist[(page - 1) * page_size:page * page_size]
+    on_result = None
+    if emit is not None:
+        emit("start", {
+            "time": datetime.now(kst).strftime('%Y-%m-%d %H:%M:%S'),
+            "page": page,
+            "page_size": page_size,
+            "interval": interval,
+            "period": period or DEFAULT_PERIODS[interval],
+            "total": len(watchlist),
+            "count": len(selected),
+        })
+
+        def on_result(i, result):
+            emit("result", {"index": i, "result": result})
+    # timings: 종목별 단계 시간의 합(초)과 prefetch, 전체 소요 시간 (Server-Timing 헤더로도 내보냄)
+    timer = StageTimer()
+    start = time.perf_counter()
+    jobs = watchlist_jobs(selected, kst, mode, interval, period)
+    results = run_jobs(jobs, executor, timeout=timeout, timer=timer, interval=interval, period=period, on_result=on_result)
+    timings = dict(timer.timings)
+    for result in results:
+        for stage, seconds in result.get("timings", {}).items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+    timings["total"] = time.perf_counter() - start
+    # expires_in: 입력 시세가 바뀔 수 있는 가장 이른 시점까지(초). 장이 닫힌 시장만 있으면 다음 개장까지
+    span = _span(interval, period)
+    symbols = dict.fromkeys(symbol for *_, job_symbols in jobs for symbol in job_symbols)
+    expires_in = cache_expires_in([(symbol, *span) for symbol in symbols])
+    if any("error" in result for result in results):
+        # 실패한 종목이 있으면 오래 들고 있지 않는다
+        expires_in = 0.0
+    # memory: 프로세스 RSS 와 이 페이지 종목별로 캐시에 남아 있는 크기(MB, 종목 자신의 심볼만 - 공유 매크로 제외)
+    usage = memory_usage()
+    memory = {
+        "rss_mb": round(usage["rss"] / 2 ** 20, 1),
+        "tickers": {
+            ticker: round(sum(usage["symbols"].get(ticker, {}).values()) / 2 ** 20, 3) for ticker, *_ in selected
+        },
+    }
+
     return {
         "status": "success",
         "time": datetime.now(kst).strftime('%Y-%m-%d %H:%M:%S'),
-        "results": results
+        "page": page,
+        "page_size": page_size,
+        "interval": interval,
+        "period": period or DEFAULT_PERIODS[interval],
+        "total": len(watchlist),
+        "results": results,
+        "timings": timings,
+        "expires_in": round(expires_in, 1),
+        "memory": memory,
     }
+
+def memory_usage():
+    # 이 프로세스의 캐시가 심볼별로 들고 있는 바이트 {심볼: {"frames", "indicators", "charts"}} 와 RSS
+    # 분석 중 잠깐 쓰는 프레임은 빠진다 - 오래 도는 워커에서 종목 수에 비례해 남아 있는 메모리
+    symbols = {}
+
+    def add(key, kind, nbytes):
+        symbol = key[0] if isinstance(key, tuple) else key
+        symbols.setdefault(symbol, dict.fromkeys(MEMORY_KINDS, 0))[kind] += nbytes
+
+    with _cache_lock:
+        for key, (_, _, nbytes) in _frame_cache.items():
+            add(key, "frames", nbytes)
+    with _states_lock:
+        for key, (_, state) in _states.items():
+            if state is not None:
+                add(key, "indicators", state.nbytes)
+    with _charts_lock:
+        for key, png in _charts.items():
+            add(key, "charts", len(png))
+    return {"rss": resident_bytes(), "symbols": symbols}
+
+MEMORY_KINDS = ("frames", "indicators", "charts")
+CACHED_BYTES.function = lambda: {
+    (symbol, kind): nbytes for symbol, kinds in memory_usage()["symbols"].items() for kind, nbytes in kinds.items()
+}
+
+def analysis_slot():
+    # 분석 한 번이 잡는 슬롯 (with analysis_slot(): ...). 슬롯이 다 차 있으면 하나가 끝날 때까지 기다린다
+    return _analysis_slots
+
+def _put_snapshot(key, result):
+    with _snapshot_lock:
+        _snapshot[key] = (time.monotonic(), result)
+        _snapshot.move_to_end(key)
+        while len(_snapshot) > SNAPSHOT_MAXSIZE:
+            _snapshot.popitem(last=False)
+
+def _get_snapshot(key):
+    with _snapshot_lock:
+        snapshot = _snapshot.get(key)
+        if snapshot is not None:
+            _snapshot.move_to_end(key)
+        return snapshot
+
+def refresh_snapshot(timeout=None, **params):
+    # 동시에 요청된 갱신은 하나로 합쳐 같은 Future 를 돌려준다 (mode/page 등 params 별로 따로)
+    # 갱신 스레드도 분석 슬롯을 잡으므로 조건이 다른 갱신이 한꺼번에 몰려도 MAX_CONCURRENT_ANALYSES 개씩만 돈다
+    key = tuple(sorted(params.items()))
+    with _snapshot_lock:
+        future = _refresh.get(key)
+        if future is not None:
+            return future
+        _refresh[key] = future = Future()
+
+    def work():
+        try:
+            with analysis_slot():
+                result = run_analysis(timeout=timeout, **params)
+            _put_snapshot(key, result)
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with _snapshot_lock:
+                del _refresh[key]
+
+    threading.Thread(target=work, daemon=True).start()
+    return future
+
+def _stale(result, age, max_age):
+    # max_age 가 지났어도 입력 시세가 아직 바뀔 수 없으면(장 마감 후, 주말) 다시 계산하지 않는다
+    return age > max_age and age >= result.get("expires_in", 0)
+
+def get_snapshot(max_age=None, timeout=None, **params):
+    # 마지막 결과를 바로 돌려주고, 오래됐으면 갱신만 걸어 둔다. 결과가 아직 없을 때만 기다린다
+    max_age = SNAPSHOT_MAX_AGE if max_age is None else max_age
+    key = tuple(sorted(params.items()))
+    snapshot = _get_snapshot(key)
+    if snapshot is None:
+        result = refresh_snapshot(timeout, **params).result()
+        return dict(result, age=0.0, stale=False)
+    taken, result = snapshot
+    age = time.monotonic() - taken
+    stale = _stale(result, age, max_age)
+    if stale:
+        refresh_snapshot(timeout, **params)
+    return dict(result, age=round(age, 1), stale=stale)
+
+def stream_analysis(emit, max_age=None, timeout=None, **params):
+    # /analyze/stream 용: 보관 중인 결과가 max_age 안이면 그대로 흘려보내고,
+    # 아니면 직접 분석하며 끝나는 종목부터 emit 한다 (결과는 스냅샷으로 남겨 /analyze 도 같이 쓴다)
+    max_age = SNAPSHOT_MAX_AGE if max_age is None else max_age
+    key = tuple(sorted(params.items()))
+    snapshot = _get_snapshot(key)
+    if snapshot is not None:
+        taken, result = snapshot
+        age = time.monotonic() - taken
+        if not _stale(result, age, max_age):
+            info = {k: v for k, v in result.items() if k not in ("status", "results", "timings")}
+            emit("start", dict(info, count=len(result["results"])))
+            for i, item in enumerate(result["results"]):
+                emit("result", {"index": i, "result": item})
+            return dict(result, age=round(age, 1), stale=False)
+    with analysis_slot():
+        result = run_analysis(timeout=timeout, emit=emit, **params)
+    _put_snapshot(key, result)
+    return dict(result, age=0.0, stale=False)
@@ -1,22 +1,17 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from analysis import run_analysis
-import uvicorn
+import os
+import sys
 
-app = FastAPI()
+# Vercel 함수 진입점. 분석 모듈과 라우트는 저장소 루트의 것을 그대로 쓰고 경로에 /api 만 붙인다
+# (루트 모듈은 vercel.json 의 includeFiles 로 함수 번들에 포함)
+# 차트 PNG 는 인스턴스 메모리에만 있으므로 /analyze 와 다른 인스턴스로 간 /api/chart 요청은 그 인스턴스가 다시 그린다
+# matplotlib 설정/글꼴 캐시는 번들에 넣어 둔 것을 쓸 수 있는 /tmp 로 옮겨 쓰고(mplcache), 차트 템플릿은 앱을 만들 때
+# 백그라운드에서 미리 그려 둔다 (PNG 차트 첫 요청이 글꼴 목록 생성/Figure 생성을 기다리지 않게)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# CORS 설정 (프론트엔드 통신 허용)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+import mplcache
 
-@app.get("/api/analyze")
-async def analyze():
-    return run_analysis()
+mplcache.install()
 
-if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+from main import create_app
+
+app = create_app("/api", warm=os.environ.get("WARM_CHARTS") != "0")
@@ -0,0 +1,169 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from analysis import MACRO_SYMBOLS, batch_indicators, btc_signals, load, load_watchlist, prefetch, stock_signals
+
+# 분석기의 매수/매도 신호를 전체 기간에 대해 포지션으로 바꿔 수익률/낙폭/적중률/회전율을 계산한다
+# 신호 계산은 종목별(pandas), 백테스트는 전 종목을 (날짜 x 종목) 배열 하나로 묶어 NumPy 로 한 번에 처리
+#   python backtest.py --period 5y --cost 0.001
+
+PERIOD = "5y"
+# 진입/청산 한 번에 드는 비용 (수수료 + 슬리피지, 비율)
+COST = 0.001
+
+SUMMARY_COLUMNS = ["total_return", "annual_return", "max_drawdown", "sharpe", "trades", "hit_rate", "turnover", "exposure"]
+
+
+def _ffill(values):
+    # (T, N) 배열의 NaN 을 열마다 앞 값으로 채운다 (앞 값이 없으면 NaN 유지)
+    rows = np.arange(len(values))[:, None]
+    last = np.maximum.accumulate(np.where(np.isnan(values), -1, rows), axis=0)
+    filled = np.take_along_axis(values, np.maximum(last, 0), axis=0)
+    return np.where(last >= 0, filled, np.nan)
+
+
+def positions(buy, sell):
+    # 매수 신호에 진입(1), 매도 신호에 청산(0), 그 사이는 직전 상태 유지. 같은 바에 둘 다 있으면 청산
+    event = np.where(sell, 0.0, np.where(buy, 1.0, np.nan))
+    return np.nan_to_num(_ffill(event), nan=0.0)
+
+
+def evaluate(prices, buy, sell, dates, cost=COST):
+    # prices/buy/sell: (T, N) 배열, dates: (T,) datetime64. 거래가 없는 날짜는 prices 가 NaN
+    # 신호는 그 바의 종가에 체결하고 수익은 다음 바부터 반영 (미래 정보 없음)
+    # -> ({지표: (N,) 배열}, (T, N) 자산 곡선)
+    observed = ~np.isnan(prices)
+    pos = positions(buy & observed, sell & observed)
+
+    filled = _ffill(prices)
+    ret = np.zeros_like(filled)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret[1:] = filled[1:] / filled[:-1] - 1
+    ret = np.nan_to_num(ret, nan=0.0, posinf=0.0, neginf=0.0)
+
+    held = np.zeros_like(pos)
+    held[1:] = pos[:-1]
+    trade = np.abs(pos - held)
+    strat = held * ret - cost * trade
+    equity = np.cumprod(1 + strat, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    # 종목별 기간(년): 첫 거래일부터 마지막 날짜까지
+    first = np.argmax(observed, axis=0)
+    years = (dates[-1] - dates[first]) / np.timedelta64(1, "D") / 365.25
+    years = np.where(years > 0, years, np.nan)
+
+    # 샤프 지수는 실제 거래일만으로 (다른 시장 휴일에 채운 0 수익은 제외)
+    bar_ret = np.where(observed, strat, np.nan)
+    bars_per_year = observed.sum(axis=0) / years
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.nanmean(bar_ret, axis=0) / np.nanstd(bar_ret, axis=0, ddof=1) * np.sqrt(bars_per_year)
+
+    # 거래별 수익: 진입 바부터 보유가 끝나는 바까지 같은 번호를 붙여 종목 x 거래 번호별로 log 수익을 합산
+    entries = (pos == 1) & (held == 0)
+    trade_no = np.cumsum(entries, axis=0)
+    in_trade = (held == 1) | entries
+    n_trades = trade_no[-1]
+    slots = n_trades.max() + 1 if n_trades.size else 1
+    cols = np.broadcast_to(np.arange(pos.shape[1]), pos.shape)
+    ids = (cols * slots + trade_no)[in_trade]
+    trade_log = np.bincount(ids, weights=np.log1p(strat[in_trade]), minlength=pos.shape[1] * slots)
+    wins = (trade_log.reshape(pos.shape[1], slots)[:, 1:] > 0).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = {
+            "total_return": equity[-1] - 1,
+            "annual_return": equity[-1] ** (1 / years) - 1,
+            "max_drawdown": drawdown.min(axis=0),
+            "sharpe": sharpe,
+            "trades": n_trades,
+            "hit_rate": np.where(n_trades > 0, wins / n_trades, np.nan),
+            # 연간 포지션 변경 횟수 (진입 + 청산)
+            "turnover": trade.sum(axis=0) / years,
+            "exposure": held.sum(axis=0) / np.maximum(len(held) - first, 1),
+        }
+    return metrics, equity
+
+
+def backtest(close, buy, sell, cost=COST):
+    # close/buy/sell: 같은 (날짜 x 종목) 모양의 DataFrame -> (종목별 요약 DataFrame, 자산 곡선 DataFrame)
+    metrics, equity = evaluate(
+        close.to_numpy(dtype=float), buy.to_numpy(dtype=bool), sell.to_numpy(dtype=bool), close.index.to_numpy(), cost
+    )
+    summary = pd.DataFrame(metrics, index=close.columns)[SUMMARY_COLUMNS]
+    return summary, pd.DataFrame(equity, index=close.index, columns=close.columns)
+
+
+def _with_indicators(df):
+    # 분석기용 증분 지표 상태(1y)를 건드리지 않도록 긴 기간은 배치로 계산
+    return df.join(batch_indicators(df))
+
+
+def signal_frames(watchlist=None, period=PERIOD):
+    # 관심 종목별 {티커: (종가, 매수, 매도)} - 분석기와 같은 신호 함수를 전체 기간에 적용
+    watchlist = load_watchlist() if watchlist is None else watchlist
+    symbols = MACRO_SYMBOLS + [s for ticker, _, baseline in watchlist for s in (ticker, baseline or "^GSPC")]
+    prefetch(symbols, period)
+    indicators = {}
+
+    def frame(symbol):
+        if symbol not in indicators:
+            indicators[symbol] = _with_indicators(load(symbol, period))
+        return indicators[symbol]
+
+    dxy, tnx = load("DX-Y.NYB", period), load("^TNX", period)
+    frames = {}
+    for ticker, _, baseline in watchlist:
+        try:
+            if baseline is None:
+                merge_df = btc_signals(frame(ticker), frame("DX-Y.NYB"), frame("^TNX"), frame("^GSPC"))
+                buy, sell = "Final_Strong_Signal", "Sell_Signal"
+            else:
+                merge_df = stock_signals(frame(ticker), dxy, tnx, frame(baseline))
+                buy, sell = "Final_Buy", "Sell"
+        except Exception as e:
+            print(f"{ticker}: 신호 계산 실패 ({e})", file=sys.stderr)
+            continue
+        if merge_df.empty:
+            print(f"{ticker}: 데이터 없음", file=sys.stderr)
+            continue
+        frames[ticker] = (merge_df["Close"], merge_df[buy] == 1, merge_df[sell] == 1)
+    return frames
+
+
+def panel(frames):
+    # {티커: (종가, 매수, 매도)} -> 날짜 합집합에 맞춘 (날짜 x 종목) DataFrame 세 개
+    close = pd.DataFrame({ticker: c for ticker, (c, _, _) in frames.items()}).sort_index()
+    buy = pd.DataFrame({ticker: b for ticker, (_, b, _) in frames.items()}).reindex(close.index)
+    sell = pd.DataFrame({ticker: s for ticker, (_, _, s) in frames.items()}).reindex(close.index)
+    return close, buy.fillna(False).astype(bool), sell.fillna(False).astype(bool)
+
+
+def run_backtest(watchlist=None, period=PERIOD, cost=COST):
+    close, buy, sell = panel(signal_frames(watchlist, period))
+    return backtest(close, buy, sell, cost)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="매수/매도 신호 백테스트")
+    parser.add_argument("--period", default=PERIOD)
+    parser.add_argument("--cost", type=float, default=COST)
+    parser.add_argument("--watchlist", help="관심 종목 csv (ticker,name,baseline)")
+    args = parser.parse_args(argv)
+
+    watchlist = load_watchlist(args.watchlist) if args.watchlist else None
+    frames = signal_frames(watchlist, args.period)
+    if not frames:
+        print("신호를 계산한 종목이 없습니다", file=sys.stderr)
+        return 1
+    summary, _ = backtest(*panel(frames), cost=args.cost)
+    with pd.option_context("display.width", 160, "display.max_rows", None, "display.max_columns", None):
+        print(summary.sort_values("total_return", ascending=False).round(4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import argparse
+import base64
+import gc
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import analysis
+from providers import SYNTHETIC_END, FileProvider, synthetic_frame
+
+# 분석 단계별 소요 시간과 최대 메모리를 합성 시세로 측정한다 (네트워크 없음, 심볼별 고정 시드라 커밋 간 비교 가능)
+#   python benchmark.py                              # 전체 측정, 표 출력
+#   python benchmark.py --output bench.json          # 결과를 JSON 으로 저장 (커밋 해시 포함)
+#   python benchmark.py --compare bench.json         # 저장된 결과보다 THRESHOLD 배 이상 느려지면 종료 코드 1
+#   python benchmark.py --sizes startup              # 콜드 스타트(진입점 임포트, 첫 요청)만
+
+# 이름 -> (합성 기간(년), interval)
+SIZES = {
+    "1y-daily": (1, "1d"),
+    "10y-daily": (10, "1d"),
+    "1y-minute": (1, "1m"),
+}
+BTC_SYMBOLS = ["BTC-USD", "DX-Y.NYB", "^TNX", "^GSPC"]
+STOCK_SYMBOLS = ["005930.KS", "^KS11"]
+# 콜드 스타트 단계: 새 인터프리터에서 Vercel 진입점(api/index.py) 임포트, 임포트 + 첫 요청(series/png)
+STARTUP_STEPS = ["import", "first_series", "first_png"]
+# 자식 프로세스에서 실행. 진입점 임포트 시간(+ 첫 요청 처리 시간)과 최대 RSS 를 JSON 으로 출력
+# (테스트 클라이언트와 합성 시세 제공자 준비는 측정에서 제외)
+STARTUP_CODE = """
+import json, resource, sys, time, warnings
+warnings.filterwarnings("ignore")
+api_dir, step = sys.argv[1:3]
+sys.path.insert(0, api_dir)
+start = time.perf_counter()
+import index
+seconds = time.perf_counter() - start
+if step != "import":
+    import analysis
+    from fastapi.testclient import TestClient
+    from providers import FileProvider
+    analysis.set_provider(FileProvider(years=1))
+    client = TestClient(index.app)
+    start = time.perf_counter()
+    response = client.get("/api/analyze", params={"mode": step.split("_")[1], "page_size": 1})
+    seconds += time.perf_counter() - start
+    response.raise_for_status()
+print(json.dumps({"seconds": seconds, "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+REPEAT = 5
+THRESHOLD = 1.25  # 기준 대비 시간 비율이 이보다 크면 회귀
+MIN_SECONDS = 0.001  # 이보다 짧은 단계는 측정 잡음이 커서 회귀 판정에서 제외
+
+
+def measure(fn, repeat):
+    # 최솟값(잡음이 가장 적은 실행)으로 시간을, 별도 한 번의 실행으로 tracemalloc 최대 메모리를 잰다
+    fn()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "median": float(np.median(times)), "peak_mb": peak / 2 ** 20}
+
+
+def stage_jobs(years, interval):
+    frames = {s: synthetic_frame(s, SYNTHETIC_END, years, interval) for s in BTC_SYMBOLS + STOCK_SYMBOLS}
+    ind = {s: df.join(analysis.batch_indicators(df)) for s, df in frames.items()}
+    btc, dxy, tnx, spx = (ind[s] for s in BTC_SYMBOLS)
+    stock, baseline = (ind[s] for s in STOCK_SYMBOLS)
+    close = frames["BTC-USD"]["Close"]
+
+    df_res = analysis.btc_macro_score(btc, dxy, tnx, spx)
+    merge_df = analysis.btc_signals(btc, dxy, tnx, spx)
+    plot_df = merge_df.tail(20)
+
+    def render():
+        png = analysis.render_chart(plot_df, "BTC benchmark", "Final_Strong_Signal", "Sell_Signal", 3)
+        return base64.b64encode(png).decode("utf-8")
+
+    columns = ["Close", "MA20", "MA20_Slope", "Volume", "VOL_MA20", "Internal_Score", "RSI"]
+    return {
+        "get_rsi": lambda: analysis.get_rsi(close, 14),
+        "safe_slope": lambda: analysis.safe_slope(close, 5),
+        "indicators": lambda: analysis.batch_indicators(frames["BTC-USD"]),
+        "macro_score": lambda: (analysis.btc_macro_score(btc, dxy, tnx, spx),
+                                analysis.stock_macro_score(stock, dxy, tnx, baseline)),
+        "merge_rs": lambda: analysis.merge_rs(df_res, btc, columns, spx["Close"], "nearest"),
+        "render_base64": render,
+    }, len(close)
+
+
+def measure_startup(step, repeat):
+    # 매번 새 프로세스 (임포트/폰트/차트 템플릿 캐시가 없는 상태). 시간은 최솟값, 메모리는 최대 RSS
+    # 새 서버리스 인스턴스처럼 HOME/TMPDIR 을 빈 디렉터리로 바꿔 이 기계의 matplotlib 캐시를 쓰지 않게 한다
+    api_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api")
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as home:
+            env = {key: value for key, value in os.environ.items() if key != "MPLCONFIGDIR"}
+            env.update(HOME=home, TMPDIR=home)
+            out = subprocess.run([sys.executable, "-c", STARTUP_CODE, api_dir, step],
+                                 capture_output=True, text=True, check=True, env=env)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    times = [r["seconds"] for r in runs]
+    return {"seconds": min(times), "median": float(np.median(times)), "peak_mb": max(r["peak_mb"] for r in runs)}
+
+
+def run_analysis_job(executor, years, interval):
+    # 매 실행마다 프레임/지표/차트 캐시를 비워 콜드 요청 한 번을 잰다 (합성 프레임 생성은 제공자에 남아 제외)
+    provider = FileProvider(years=years)
+
+    def job():
+        analysis.set_provider(provider)
+        with analysis._charts_lock:
+            analysis._charts.clear()
+        return analysis.run_analysis(executor=executor, mode="png", interval=interval, period=f"{years}y")
+
+    return job
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(sizes, stages, repeat, executor):
+    results = {}
+    for size in sizes:
+        if size == "startup":
+            for step in STARTUP_STEPS:
+                if stages and step not in stages:
+                    continue
+                result = results[f"startup/{step}"] = measure_startup(step, repeat)
+                print(f"{size:<10} {step:<14} {'':>13} {result['seconds'] * 1000:>10.2f} ms "
+                      f"{result['peak_mb']:>9.2f} MB", flush=True)
+            continue
+        years, interval = SIZES[size]
+        jobs, rows = stage_jobs(years, interval)
+        jobs["run_analysis"] = run_analysis_job(executor, years, interval)
+        for name, fn in jobs.items():
+            if stages and name not in stages:
+                continue
+            result = measure(fn, repeat)
+            result["rows"] = rows
+            results[f"{size}/{name}"] = result
+            print(f"{size:<10} {name:<14} {rows:>8} rows {result['seconds'] * 1000:>10.2f} ms "
+                  f"{result['peak_mb']:>9.2f} MB", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"\n기준: {baseline.get('commit')} ({baseline.get('time')})")
+    for key, result in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        mem = result["peak_mb"] / base["peak_mb"] if base["peak_mb"] else 1.0
+        slow = ratio > threshold and result["seconds"] >= MIN_SECONDS
+        flag = "  << 회귀" if slow else ""
+        print(f"{key:<26} 시간 x{ratio:5.2f}  메모리 x{mem:5.2f}{flag}")
+        if slow:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="btc_yun 분석 단계 벤치마크")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES) + ["startup"], default=list(SIZES) + ["startup"])
+    parser.add_argument("--stages", nargs="+", help="측정할 단계만 (기본: 전부)")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--executor", choices=["sequential", "thread", "process"], default="sequential")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+    # 한글 제목의 글리프 누락 경고가 결과 표를 가리지 않도록
+    warnings.filterwarnings("ignore", "Glyph .* missing", UserWarning)
+
+    results = run(args.sizes, args.stages, args.repeat, args.executor)
+    record = {
+        "commit": git_commit(),
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "repeat": args.repeat,
+        "executor": args.executor,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)}개 단계가 {args.threshold}배 이상 느려짐: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,11 @@
-import yfinance as yf
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta, timezone
-import time
+from analysis import load, safe_slope
 
 # ===============================
 # 0. 필수 함수
 # ===============================
-def flatten(df):
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-    return df
-
 def get_rsi_custom(series, length=14):
     delta = series.diff()
     up = delta.clip(lower=0)
@@ -42,10 +35,10 @@ try:
     # ===============================
     # 1. 데이터 다운로드
     # ===============================
-    dxy = flatten(yf.download("DX-Y.NYB", period="1y", progress=False))
-    tnx = flatten(yf.download("^TNX", period="1y", progress=False))
-    spx = flatten(yf.download("^GSPC", period="1y", progress=False))
-    btc = flatten(yf.download("BTC-USD", period="1y", progress=False))
+    dxy = load("DX-Y.NYB")
+    tnx = load("^TNX")
+    spx = load("^GSPC")
+    btc = load("BTC-USD")
 
     # 현재 가격 출력
     current_btc_price = btc["Close"].iloc[-1]
@@ -56,12 +49,13 @@ try:
     # ===============================
     dxy["MA20"] = dxy["Close"].rolling(20).mean()
     dxy["MA60"] = dxy["Close"].rolling(60).mean()
+    dxy["MA60_Slope"] = safe_slope(dxy["MA60"], 10)
     tnx["MA20"] = tnx["Close"].rolling(20).mean()
     spx["MA60"] = spx["Close"].rolling(60).mean()
     spx["VOL"] = spx["Close"].pct_change().rolling(10).std()
 
     btc["MA20"] = btc["Close"].rolling(20).mean()
-    btc["MA20_Slope"] = btc["MA20"].rolling(5).apply(lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x)>=2 else 0, raw=True)
+    btc["MA20_Slope"] = safe_slope(btc["MA20"], 5)
     btc["VOL_MA20"] = btc["Volume"].rolling(20).mean()
     btc["VOL_RATIO"] = btc["Volume"] / btc["VOL_MA20"]
     btc["Internal_Score"] = (btc["VOL_RATIO"] > 1.3).astype(int)
@@ -78,7 +72,7 @@ try:
             t_idx = tnx.index.get_indexer([date], method='pad')[0]
             s_idx = spx.index.get_indexer([date], method='pad')[0]
             
-            dxy_s = int(dxy["MA20"].iloc[d_idx] < dxy["MA60"].iloc[d_idx] and np.polyfit(range(10), dxy["MA60"].iloc[d_idx-9:d_idx+1], 1)[0] < 0)
+            dxy_s = int(dxy["MA20"].iloc[d_idx] < dxy["MA60"].iloc[d_idx] and dxy["MA60_Slope"].iloc[d_idx] < 0)
             rate_s = int(tnx["MA20"].iloc[t_idx] < tnx["MA20"].iloc[t_idx-5])
             stock_s = int(spx["Close"].iloc[s_idx] > spx["MA60"].iloc[s_idx] and spx["VOL"].iloc[s_idx] < spx["VOL"].iloc[s_idx-5])
             results.append({"Date": date, "BTC_Score": dxy_s + rate_s + stock_s})
@@ -92,7 +86,7 @@ try:
     spx_aligned = spx["Close"].reindex(merge_df.index, method="nearest")
     merge_df["RS"] = merge_df["Close"] / spx_aligned
     merge_df["RS_MA20"] = merge_df["RS"].rolling(20).mean()
-    merge_df["RS_Slope"] = merge_df["RS"].rolling(5).apply(lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x)>=2 else 0, raw=True)
+    merge_df["RS_Slope"] = safe_slope(merge_df["RS"], 5)
     merge_df["Internal_Strong"] = (merge_df["Internal_Score"].rolling(2).sum() >= 1).astype(int)
     merge_df["Final_Strong_Signal"] = ((merge_df["BTC_Score"] >= 2) & (merge_df["Internal_Strong"] == 1) & (merge_df["MA20_Slope"] > 0)).astype(int)
     merge_df["Sell_Signal"] = (merge_df["BTC_Score"] <= 1).astype(int)
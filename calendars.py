@@ -0,0 +1,65 @@
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# 거래소 정규 세션으로 시세 캐시의 유효 시간을 정한다
+# 세션 중(과 마감 직후 SETTLE 동안)은 짧은 TTL, 그 밖에는 다음 세션이 열릴 때까지 그대로 쓴다
+# 공휴일은 모르는 채로 평일을 세션으로 본다 (그날은 짧은 TTL 로 다시 받을 뿐 결과는 같다)
+
+# 이름 -> (시간대, 개장, 마감, 세션이 끝나는 요일(월=0)). 개장이 마감보다 늦으면 전날 저녁에 열리는 세션
+CALENDARS = {
+    "KRX": (ZoneInfo("Asia/Seoul"), time(9, 0), time(15, 30), range(5)),
+    "NYSE": (ZoneInfo("America/New_York"), time(9, 30), time(16, 0), range(5)),
+    # ICE 달러 인덱스 선물: 일~금 18:00 - 다음날 17:00 (ET)
+    "ICE": (ZoneInfo("America/New_York"), time(18, 0), time(17, 0), range(5)),
+}
+# 미국 정규장 시간을 따르는 지수/금리 (그 밖의 ^ 지수, 환율(=X) 등은 모르는 시장으로 둔다)
+US_INDICES = {"^GSPC", "^DJI", "^IXIC", "^RUT", "^VIX", "^TNX", "^IRX", "^FVX", "^TYX"}
+# 마감 후 이 시간 동안은 종가/마지막 바 수정이 들어올 수 있어 세션 중처럼 다룬다
+SETTLE = timedelta(minutes=15)
+# 세션을 찾을 때 앞뒤로 훑는 일수 (연휴 없이 주말만 건너뛰면 충분)
+SEARCH_DAYS = 7
+
+
+def calendar_for(symbol):
+    # 심볼 -> 거래소 이름. "24/7" 은 암호화폐, None 은 모르는 시장 (기본 TTL)
+    if symbol.endswith("-USD"):
+        return "24/7"
+    if symbol.endswith((".KS", ".KQ")) or symbol in ("^KS11", "^KQ11"):
+        return "KRX"
+    if symbol == "DX-Y.NYB":
+        return "ICE"
+    if symbol in US_INDICES or not (symbol.startswith("^") or "." in symbol or "=" in symbol):
+        return "NYSE"
+    return None
+
+
+def sessions(name, start, end):
+    # start~end(UTC) 에 걸친 (개장, 마감) UTC 시각 목록
+    tz, open_time, close_time, days = CALENDARS[name]
+    overnight = open_time > close_time
+    first = start.astimezone(tz).date() - timedelta(days=1)
+    last = end.astimezone(tz).date() + timedelta(days=1)
+    result = []
+    day = first
+    while day <= last:
+        if day.weekday() in days:
+            open_day = day - timedelta(days=1) if overnight else day
+            opens = datetime.combine(open_day, open_time, tz).astimezone(timezone.utc)
+            closes = datetime.combine(day, close_time, tz).astimezone(timezone.utc)
+            if closes > start and opens < end:
+                result.append((opens, closes))
+        day += timedelta(days=1)
+    return result
+
+
+def valid_until(symbol, now, session_ttl):
+    # now(UTC) 에 받은 symbol 시세를 언제까지 그대로 써도 되는지 (UTC 시각)
+    name = calendar_for(symbol)
+    if name is None or name == "24/7":
+        return now + timedelta(seconds=session_ttl)
+    around = sessions(name, now - timedelta(days=SEARCH_DAYS), now + timedelta(days=SEARCH_DAYS))
+    for opens, closes in around:
+        if opens <= now < closes + SETTLE:
+            return now + timedelta(seconds=session_ttl)
+    upcoming = [opens for opens, _ in around if opens > now]
+    return upcoming[0] if upcoming else now + timedelta(seconds=session_ttl)
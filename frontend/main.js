@@ -6,6 +6,277 @@ const timeValue = document.getElementById('timeValue');
 const btnText = analyzeBtn.querySelector('.btn-text');
 const loader = analyzeBtn.querySelector('.loader');
 
+// 서버가 차트 구간 데이터만 보내고(mode=series) 차트는 브라우저에서 그린다
+const CHART_COLORS = {
+    bg: '#0f172a', grid: '#334155', text: '#ffffff',
+    close: '#38bdf8', ma: '#94a3b8', score: 'rgba(244, 63, 94, 0.3)',
+    up: '#f43f5e', down: '#10b981', volume: '#475569', rsMa: '#f59e0b', rsi: '#a855f7',
+};
+
+function drawChart(canvas, series, title) {
+    const ratio = window.devicePixelRatio || 1;
+    const width = canvas.clientWidth || 800;
+    const height = width * 0.8;
+    canvas.width = width * ratio;
+    canvas.height = height * ratio;
+    canvas.style.height = `${height}px`;
+    const ctx = canvas.getContext('2d');
+    ctx.scale(ratio, ratio);
+    ctx.fillStyle = CHART_COLORS.bg;
+    ctx.fillRect(0, 0, width, height);
+
+    ctx.fillStyle = CHART_COLORS.text;
+    ctx.font = '14px sans-serif';
+    ctx.textAlign = 'center';
+    ctx.fillText(title, width / 2, 20);
+
+    // 가격 / 거래량 / RS / RSI 4단 (matplotlib 차트와 같은 높이 비율)
+    const n = series.index.length;
+    const left = 60, right = 40, top = 34, bottom = 28, gap = 14;
+    const weights = [3, 1, 1.2, 1];
+    const usable = height - top - bottom - gap * (weights.length - 1);
+    const total = weights.reduce((a, b) => a + b, 0);
+    let y0 = top;
+    const panels = weights.map(w => {
+        const panel = { top: y0, height: usable * w / total };
+        y0 += panel.height + gap;
+        return panel;
+    });
+    const xAt = i => left + (n <= 1 ? 0.5 : i / (n - 1)) * (width - left - right);
+
+    function scaleFor(panel, arrays, fixed) {
+        let lo = Infinity, hi = -Infinity;
+        if (fixed) {
+            [lo, hi] = fixed;
+        } else {
+            arrays.flat().forEach(v => {
+                if (v !== null) { lo = Math.min(lo, v); hi = Math.max(hi, v); }
+            });
+            const pad = (hi - lo) * 0.05 || Math.abs(hi) * 0.05 || 1;
+            lo -= pad; hi += pad;
+        }
+        return v => panel.top + panel.height - (v - lo) / (hi - lo) * panel.height;
+    }
+
+    function frame(panel, yAt, ticks) {
+        ctx.strokeStyle = CHART_COLORS.grid;
+        ctx.lineWidth = 1;
+        ctx.setLineDash([]);
+        ctx.strokeRect(left, panel.top, width - left - right, panel.height);
+        ctx.fillStyle = CHART_COLORS.text;
+        ctx.font = '10px sans-serif';
+        ctx.textAlign = 'right';
+        ticks.forEach(v => ctx.fillText(Number(v.toPrecision(4)).toLocaleString('en-US'), left - 4, yAt(v) + 3));
+    }
+
+    function line(values, yAt, color, { width: lw = 1.5, dash = [], steps = false } = {}) {
+        ctx.strokeStyle = color;
+        ctx.lineWidth = lw;
+        ctx.setLineDash(dash);
+        ctx.beginPath();
+        let open = false;
+        values.forEach((v, i) => {
+            if (v === null) { open = false; return; }
+            if (!open) {
+                ctx.moveTo(xAt(i), yAt(v));
+                open = true;
+            } else if (steps) {
+                const mid = (xAt(i - 1) + xAt(i)) / 2;
+                ctx.lineTo(mid, yAt(values[i - 1]));
+                ctx.lineTo(mid, yAt(v));
+                ctx.lineTo(xAt(i), yAt(v));
+            } else {
+                ctx.lineTo(xAt(i), yAt(v));
+            }
+        });
+        ctx.stroke();
+        ctx.setLineDash([]);
+    }
+
+    function marker(x, y, color, upward) {
+        ctx.fillStyle = color;
+        ctx.beginPath();
+        ctx.moveTo(x, y + (upward ? -6 : 6));
+        ctx.lineTo(x - 6, y + (upward ? 5 : -5));
+        ctx.lineTo(x + 6, y + (upward ? 5 : -5));
+        ctx.fill();
+    }
+
+    // 1. 가격 + MA20 + 매크로 점수(보조축) + 매수/매도 신호
+    const [p1, p2, p3, p4] = panels;
+    const buyY = series.Close.map((c, i) => series.buy[i] ? c * 0.96 : null);
+    const sellY = series.Close.map((c, i) => series.sell[i] ? c * 1.04 : null);
+    const y1 = scaleFor(p1, [series.Close, series.MA20, buyY, sellY]);
+    const y1b = scaleFor(p1, [], [0, 3.5]);
+    const closeValues = series.Close.filter(v => v !== null);
+    frame(p1, y1, [Math.min(...closeValues), Math.max(...closeValues)]);
+    line(series.Score, y1b, CHART_COLORS.score, { width: 4, steps: true });
+    line(series.MA20, y1, CHART_COLORS.ma, { dash: [5, 4] });
+    line(series.Close, y1, CHART_COLORS.close, { width: 2 });
+    series.Close.forEach((v, i) => {
+        if (v === null) return;
+        ctx.fillStyle = CHART_COLORS.close;
+        ctx.beginPath();
+        ctx.arc(xAt(i), y1(v), 3, 0, Math.PI * 2);
+        ctx.fill();
+    });
+    buyY.forEach((v, i) => v !== null && marker(xAt(i), y1(v), CHART_COLORS.up, true));
+    sellY.forEach((v, i) => v !== null && marker(xAt(i), y1(v), CHART_COLORS.down, false));
+
+    // 2. 거래량 (20일 평균 초과 시 강조) + 거래량 MA20
+    const y2 = scaleFor(p2, [series.Volume, series.VOL_MA20, [0]]);
+    frame(p2, y2, [Math.max(...series.Volume.filter(v => v !== null))]);
+    const barWidth = (width - left - right) / Math.max(n, 1) * 0.7;
+    series.Volume.forEach((v, i) => {
+        if (v === null) return;
+        ctx.fillStyle = v > series.VOL_MA20[i] ? CHART_COLORS.up : CHART_COLORS.volume;
+        ctx.globalAlpha = 0.6;
+        ctx.fillRect(xAt(i) - barWidth / 2, y2(v), barWidth, y2(0) - y2(v));
+        ctx.globalAlpha = 1;
+    });
+    line(series.VOL_MA20, y2, 'rgba(255, 255, 255, 0.5)', { dash: [2, 3] });
+
+    // 3. RS (기울기 부호로 구간 색) + RS MA20
+    const y3 = scaleFor(p3, [series.RS, series.RS_MA20]);
+    const rsValues = series.RS.filter(v => v !== null);
+    frame(p3, y3, [Math.min(...rsValues), Math.max(...rsValues)]);
+    for (let i = 0; i < n - 1; i++) {
+        if (series.RS[i] === null || series.RS[i + 1] === null) continue;
+        ctx.strokeStyle = series.RS_Slope[i + 1] > 0 ? CHART_COLORS.down : CHART_COLORS.up;
+        ctx.lineWidth = 2;
+        ctx.beginPath();
+        ctx.moveTo(xAt(i), y3(series.RS[i]));
+        ctx.lineTo(xAt(i + 1), y3(series.RS[i + 1]));
+        ctx.stroke();
+    }
+    line(series.RS_MA20, y3, CHART_COLORS.rsMa, { dash: [5, 4] });
+
+    // 4. RSI + 30/50/70 기준선
+    const y4 = scaleFor(p4, [series.RSI, [30, 70]]);
+    frame(p4, y4, [30, 50, 70]);
+    [[30, CHART_COLORS.up, [5, 4]], [70, CHART_COLORS.down, [5, 4]], [50, CHART_COLORS.close, [2, 3]]].forEach(([v, c, d]) => {
+        line(series.RSI.map(() => v), y4, c, { width: 1, dash: d });
+    });
+    line(series.RSI, y4, CHART_COLORS.rsi);
+
+    // x축 날짜 (최대 6개). 분봉/시간봉이면 월-일 시:분
+    ctx.fillStyle = CHART_COLORS.text;
+    ctx.font = '10px sans-serif';
+    ctx.textAlign = 'center';
+    const intraday = series.index.some(ts => ts.slice(11, 19) !== '' && ts.slice(11, 19) !== '00:00:00');
+    const step = Math.max(1, Math.ceil(n / 6));
+    for (let i = 0; i < n; i += step) {
+        const label = intraday ? series.index[i].slice(5, 16).replace('T', ' ') : series.index[i].slice(0, 10);
+        ctx.fillText(label, xAt(i), p4.top + p4.height + 16);
+    }
+}
+
+// 결과 카드 하나를 만든다 (time: 분석 시각, base: 차트 URL 의 기준 주소)
+function renderResult(result, time, base) {
+    if (result.error) {
+        const errorDiv = document.createElement('div');
+        errorDiv.className = 'glass';
+        errorDiv.style.padding = '1rem';
+        errorDiv.style.color = '#f43f5e';
+        errorDiv.textContent = `${result.name} 분석 에러: ${result.error}`;
+        return { card: errorDiv };
+    }
+
+    const clone = resultTemplate.content.cloneNode(true);
+    const card = clone.firstElementChild;
+
+    clone.querySelector('.result-title').textContent = result.name;
+    clone.querySelector('.price-value').textContent = new Intl.NumberFormat('en-US').format(result.price);
+    clone.querySelector('.price-unit').textContent = result.unit;
+
+    const scoreEl = clone.querySelector('.score-value');
+    scoreEl.textContent = result.score.toFixed(0);
+
+    // 점수에 따른 색상 (BTC는 3점이 만점, 주식은 3점이 만점/초과 가능)
+    if (result.score >= 2) {
+        scoreEl.style.color = '#f43f5e';
+    } else if (result.score <= 1) {
+        scoreEl.style.color = '#10b981';
+    } else {
+        scoreEl.style.color = '#38bdf8';
+    }
+
+    if (result.series) {
+        const canvas = clone.querySelector('.chart-canvas');
+        canvas.classList.remove('hidden');
+        // 캔버스 크기를 알 수 있도록 문서에 붙인 뒤 그린다
+        return { card, draw: () => drawChart(canvas, result.series, `${result.name} Analysis - ${time}`) };
+    }
+
+    // 차트 URL 은 API 주소 기준 상대 경로
+    const img = clone.querySelector('.chart-img');
+    img.classList.remove('hidden');
+    img.src = new URL(result.chart, base).href;
+    img.alt = `${result.name} 분석 차트`;
+    return { card };
+}
+
+// 끝난 순서대로 도착한 카드를 관심 종목 순서(index) 자리에 끼워 넣는다
+function placeResult(slots, index, rendered) {
+    const next = slots.findIndex((slot, i) => i > index && slot);
+    resultWrapper.insertBefore(rendered.card, next === -1 ? null : slots[next]);
+    slots[index] = rendered.card;
+    if (rendered.draw) rendered.draw();
+}
+
+function showTime(time, age) {
+    // 서버가 보관 중인 결과를 돌려줬다면 결과 나이를 함께 표기
+    timeValue.textContent = age >= 1 ? `${time} (${Math.round(age)}초 전 결과)` : time;
+    lastUpdate.classList.remove('hidden');
+}
+
+// 스트리밍(/api/analyze/stream): 종목 분석이 끝나는 대로 카드를 그린다
+// 첫 이벤트 전에 연결이 실패하면(스트리밍을 못 하는 환경) false 로 끝나 기존 방식으로 다시 받는다
+function streamAnalysis(params) {
+    return new Promise((resolve, reject) => {
+        const url = `/api/analyze/stream?${params}`;
+        const source = new EventSource(url);
+        const base = new URL(url, location.href).href;
+        const slots = [];
+        let time = null;
+
+        source.addEventListener('start', (event) => {
+            time = JSON.parse(event.data).time;
+        });
+        source.addEventListener('result', (event) => {
+            const { index, result } = JSON.parse(event.data);
+            placeResult(slots, index, renderResult(result, time, base));
+        });
+        source.addEventListener('done', (event) => {
+            const data = JSON.parse(event.data);
+            source.close();
+            showTime(data.time, data.age);
+            resolve(true);
+        });
+        source.addEventListener('error', (event) => {
+            source.close();
+            if (event.data) {
+                reject(new Error(JSON.parse(event.data).message));
+            } else if (time === null) {
+                resolve(false);
+            } else {
+                reject(new Error('스트리밍 연결이 끊어졌습니다.'));
+            }
+        });
+    });
+}
+
+async function fetchAnalysis(params) {
+    const response = await fetch(`/api/analyze?${params}`);
+    const data = await response.json();
+    if (data.status !== 'success') {
+        throw new Error(data.message);
+    }
+    const slots = [];
+    data.results.forEach((result, index) => placeResult(slots, index, renderResult(result, data.time, response.url)));
+    showTime(data.time, data.age);
+}
+
 analyzeBtn.addEventListener('click', async () => {
     try {
         // UI 상태 업데이트: 로딩 중
@@ -16,58 +287,20 @@ analyzeBtn.addEventListener('click', async () => {
         lastUpdate.classList.add('hidden');
 
         // 백엔드 API 호출
-        const response = await fetch('/api/analyze');
-        const data = await response.json();
-
-        if (data.status === 'success') {
-            // 시간 표기
-            timeValue.textContent = data.time;
-            lastUpdate.classList.remove('hidden');
-
-            // 개별 결과 렌더링
-            data.results.forEach(result => {
-                if (result.error) {
-                    const errorDiv = document.createElement('div');
-                    errorDiv.className = 'glass';
-                    errorDiv.style.padding = '1rem';
-                    errorDiv.style.color = '#f43f5e';
-                    errorDiv.textContent = `${result.name} 분석 에러: ${result.error}`;
-                    resultWrapper.appendChild(errorDiv);
-                    return;
-                }
-
-                const clone = resultTemplate.content.cloneNode(true);
-
-                clone.querySelector('.result-title').textContent = result.name;
-                clone.querySelector('.price-value').textContent = new Intl.NumberFormat('en-US').format(result.price);
-                clone.querySelector('.price-unit').textContent = result.unit;
-
-                const scoreEl = clone.querySelector('.score-value');
-                scoreEl.textContent = result.score.toFixed(0);
-
-                // 점수에 따른 색상 (BTC는 3점이 만점, 주식은 3점이 만점/초과 가능)
-                if (result.score >= 2) {
-                    scoreEl.style.color = '#f43f5e';
-                } else if (result.score <= 1) {
-                    scoreEl.style.color = '#10b981';
-                } else {
-                    scoreEl.style.color = '#38bdf8';
-                }
-
-                clone.querySelector('.chart-img').src = result.chart;
-                clone.querySelector('.chart-img').alt = `${result.name} 분석 차트`;
-
-                resultWrapper.appendChild(clone);
-            });
-
-            // 상단으로 스크롤
-            resultWrapper.scrollIntoView({ behavior: 'smooth' });
-        } else {
-            alert('에러 발생: ' + data.message);
+        // 페이지 주소의 ?interval=1h&period=1mo 등을 그대로 넘긴다
+        const params = new URLSearchParams(location.search);
+        params.set('mode', 'series');
+        const streamed = window.EventSource ? await streamAnalysis(params) : false;
+        if (!streamed) {
+            await fetchAnalysis(params);
         }
+
+        // 상단으로 스크롤
+        resultWrapper.scrollIntoView({ behavior: 'smooth' });
     } catch (error) {
         console.error('Fetch Error:', error);
-        alert('백엔드 서버가 실행 중인지 확인해주세요.');
+        // 네트워크 오류(fetch 실패)는 서버 상태를, 그 밖에는 서버가 보낸 메시지를 보여 준다
+        alert(error instanceof TypeError ? '백엔드 서버가 실행 중인지 확인해주세요.' : '에러 발생: ' + error.message);
     } finally {
         // UI 상태 복구
         analyzeBtn.disabled = false;
@@ -1,22 +1,175 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from analysis import run_analysis
-import uvicorn
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import AfterValidator
+from analysis import MAX_PAGE_SIZE, PAGE_SIZE, chart_png, check_period, get_snapshot, single_flight_async, stream_analysis, warm_charts
+from metrics import CONTENT_TYPE, REQUEST_SECONDS, render, server_timing
+from profiling import PROFILE_ENABLED, profile_analysis
 
-app = FastAPI()
+# 분석 한 번의 제한 시간(초). 동시에 실행할 수 있는 분석 수는 analysis.MAX_CONCURRENT_ANALYSES
+# (백그라운드 갱신까지 같은 슬롯을 쓰도록 분석 쪽에서 제한한다)
+ANALYSIS_TIMEOUT = 20
+# 이보다 오래된(초) 결과는 돌려준 뒤 백그라운드에서 다시 계산
+SNAPSHOT_MAX_AGE = 60
+# 차트 URL 에 데이터 버전이 들어가므로 내용이 바뀌지 않는다
+CHART_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 프록시가 이벤트를 모아 두지 않도록
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# WARM_CHARTS=1: 앱을 만들 때 백그라운드에서 차트 템플릿을 그려 둔다 (PNG 차트를 쓰는 배포에서 첫 요청 지연 감소)
+# 서버리스 진입점(api/index.py)은 기본으로 켠다 (WARM_CHARTS=0 이면 끔)
+WARM_CHARTS = os.environ.get("WARM_CHARTS") == "1"
 
-# CORS 설정 (프론트엔드 통신 허용)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# 기간 쿼리: 5d, 6mo, 2y 형식에 analysis.MAX_PERIOD_YEARS 이하 (아니면 422)
+Period = Annotated[Optional[str], Query(pattern=r"^\d+(d|mo|y)$"), AfterValidator(lambda value: value and check_period(value))]
 
-@app.get("/analyze")
-async def analyze():
-    return run_analysis()
+# 라우트는 한 곳에만 두고, 로컬 서버(main.py)와 Vercel 함수(api/index.py)가 경로 접두사만 달리해 쓴다
+router = APIRouter()
+
+async def _analyze(mode, page, page_size, interval, period):
+    # 분석은 동기 코드이므로 이벤트 루프 밖(스레드풀)에서 실행
+    # 마지막 결과를 바로 돌려주고(age: 결과 나이, 초), 오래됐으면 갱신은 백그라운드에서 한 번만 돈다
+    return await run_in_threadpool(
+        get_snapshot, SNAPSHOT_MAX_AGE, ANALYSIS_TIMEOUT,
+        mode=mode, page=page, page_size=page_size, interval=interval, period=period,
+    )
+
+@router.get("/analyze")
+async def analyze(
+    response: Response,
+    mode: Literal["png", "series"] = "png",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    interval: Literal["1d", "1h", "5m", "1m", "1wk", "1mo"] = "1d",
+    period: Period = None,
+    profile: Optional[Literal["warm", "cold"]] = None,
+):
+    # mode=series 는 차트 이미지 대신 차트 구간 데이터(컬럼별 배열)를 돌려준다
+    # 관심 종목이 많으면 page/page_size 로 나눠 받는다
+    # interval=1h|5m|1m 은 분봉/시간봉, 1wk|1mo 는 일봉을 리샘플링한 주봉/월봉 분석
+    # period 는 기간(예: 5d, 6mo, 2y. 없으면 간격별 기본값)
+    # 동시에 들어온 요청은 진행 중인 한 번의 처리를 함께 기다린다
+    # profile=warm|cold (PROFILE_ENABLED=1 일 때만): 이 요청에서 직접 분석하며 프로파일 보고서를 "profile" 에 붙인다
+    start = time.perf_counter()
+    if profile is not None:
+        if not PROFILE_ENABLED:
+            raise HTTPException(status_code=403, detail="profiling is disabled")
+        result = await run_in_threadpool(
+            profile_analysis, profile == "cold",
+            mode=mode, page=page, page_size=page_size, interval=interval, period=period,
+        )
+    else:
+        result = await single_flight_async(
+            ("analyze", mode, page, page_size, interval, period), _analyze, mode, page, page_size, interval, period
+        )
+    elapsed = time.perf_counter() - start
+    REQUEST_SECONDS.observe(elapsed, "analyze")
+    # 결과를 만든 분석의 단계별 시간(스냅샷이면 그 계산 당시 값) + 이번 요청의 처리 시간(app)
+    response.headers["Server-Timing"] = server_timing(result.get("timings", {}), app=elapsed)
+    return result
+
+def _event(event, data):
+    # Server-Sent Events 한 건
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+@router.get("/analyze/stream")
+async def analyze_stream(
+    mode: Literal["png", "series"] = "png",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    interval: Literal["1d", "1h", "5m", "1m", "1wk", "1mo"] = "1d",
+    period: Period = None,
+):
+    # /analyze 와 같은 결과를 Server-Sent Events 로 종목이 끝나는 대로 보낸다
+    # start(페이지 정보) -> result({index, result}) 를 끝난 순서대로 -> done(결과 나이, 단계별 시간) 또는 error
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def emit(event, data):
+        # 분석 스레드에서 불리므로 이벤트 루프 쪽 큐로 넘긴다
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    async def run():
+        try:
+            result = await run_in_threadpool(
+                stream_analysis, emit, SNAPSHOT_MAX_AGE, ANALYSIS_TIMEOUT,
+                mode=mode, page=page, page_size=page_size, interval=interval, period=period,
+            )
+            elapsed = time.perf_counter() - start
+            done = {key: value for key, value in result.items() if key != "results"}
+            done["timings"] = dict(result.get("timings", {}), app=elapsed)
+            queue.put_nowait(("done", done))
+        except Exception as e:
+            queue.put_nowait(("error", {"message": str(e)}))
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, "analyze_stream")
+
+    async def events():
+        # 클라이언트가 끊어도 분석은 끝까지 돌아 스냅샷으로 남는다
+        task = asyncio.create_task(run())
+        while True:
+            event, data = await queue.get()
+            yield _event(event, data)
+            if event in ("done", "error"):
+                break
+        await task
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=STREAM_HEADERS)
+
+@router.get("/chart/{ticker}/{version}.png")
+async def chart(
+    ticker: str,
+    version: str,
+    request: Request,
+    interval: Literal["1d", "1h", "5m", "1m", "1wk", "1mo"] = "1d",
+    period: Period = None,
+):
+    # 이 프로세스에 없는 차트(저장소에서 밀려났거나 다른 인스턴스가 만든 URL)는 같은 조건으로 다시 분석해 그린다
+    # 그사이 시세가 바뀌어 버전이 달라졌으면 지금 버전의 URL 로 보낸다 (버전이 같은 URL 은 내용도 같다)
+    headers = {"ETag": f'"{version}"', "Cache-Control": CHART_CACHE_CONTROL}
+    if request.headers.get("if-none-match") in (headers["ETag"], f'W/{headers["ETag"]}'):
+        # 클라이언트가 이 버전을 갖고 있으면 다시 그릴 필요 없이 304
+        return Response(status_code=304, headers=headers)
+    current, png = await run_in_threadpool(chart_png, ticker, version, interval, period)
+    if png is None:
+        raise HTTPException(status_code=404, detail="chart not found")
+    if current != version:
+        return RedirectResponse(f"{current}.png?{request.url.query}", status_code=307, headers={"Cache-Control": "no-store"})
+    if request.headers.get("if-none-match") == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(png, media_type="image/png", headers=headers)
+
+@router.get("/metrics")
+async def metrics():
+    # Prometheus 수집용 (단계별 시간 히스토그램, 종목별 에러 수)
+    return Response(render(), media_type=CONTENT_TYPE)
+
+def create_app(prefix="", warm=WARM_CHARTS):
+    app = FastAPI()
+    # CORS 설정 (프론트엔드 통신 허용)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router, prefix=prefix)
+    if warm:
+        threading.Thread(target=warm_charts, daemon=True).start()
+    return app
+
+app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,167 @@
+import bisect
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+# 분석 단계별 소요 시간/에러 수를 프로세스 안에 모아 두고 Prometheus 텍스트 형식으로 내보낸다 (/metrics)
+# 프로세스 풀 워커에서 잰 시간은 결과와 함께 부모로 돌아와 부모에서 기록된다
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# 초 단위 버킷 (지표 계산 수 ms ~ 콜드 다운로드 수십 초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in self._values.items():
+                lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # 라벨 값 -> [버킷별 개수(누적 아님)..., +Inf], 합계, 개수
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in self._series.items():
+                cumulative = 0
+                for bound, n in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += n
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    # 값을 쌓아 두지 않고 수집할 때마다 function() 이 돌려주는 {라벨 값 튜플: 값} 을 그대로 내보낸다 (메모리 크기처럼 그때그때 재는 값)
+    def __init__(self, name, help, labels=(), function=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.function = function
+        _registry.append(self)
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in (self.function() if self.function else {}).items():
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+def resident_bytes():
+    # 현재 RSS (리눅스 /proc, 그 밖에는 지금까지의 최대 RSS 로 대신)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def render():
+    return "\n".join(line for metric in _registry for line in metric.collect()) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "analysis_stage_seconds", "Time spent in each analysis stage", ["stage", "ticker"]
+)
+ANALYSIS_ERRORS = Counter(
+    "analysis_errors_total", "Failed ticker analyses by stage and exception type", ["ticker", "stage", "error"]
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "End-to-end handler time", ["endpoint"]
+)
+RESIDENT_BYTES = Gauge(
+    "process_resident_memory_bytes", "Resident set size of this process", function=lambda: {(): resident_bytes()}
+)
+# 분석 모듈이 function 을 채운다 (심볼별 프레임 캐시/지표 상태/차트가 들고 있는 바이트)
+CACHED_BYTES = Gauge(
+    "analysis_cached_bytes", "Bytes held per symbol by the frame cache, indicator state and chart store", ["symbol", "kind"]
+)
+
+
+class StageTimer:
+    # 분석 한 번의 단계별 소요 시간(초). 예외가 나면 current 에 실패한 단계가 남는다
+    # listener(name, "start"|"end"): 프로파일링 중 단계 경계마다 호출 (측정 시간에는 포함되지 않음)
+    listener = None
+
+    def __init__(self):
+        self.timings = {}
+        self.current = None
+
+    @contextmanager
+    def stage(self, name):
+        listener = StageTimer.listener
+        if listener is not None:
+            listener(name, "start")
+        self.current = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+            if listener is not None:
+                listener(name, "end")
+        self.current = None
+
+
+def record(ticker, result):
+    # 분석기 결과(dict)의 단계별 시간과 에러를 지표에 반영
+    for stage, seconds in result.get("timings", {}).items():
+        STAGE_SECONDS.observe(seconds, stage, ticker)
+    if "error" in result:
+        ANALYSIS_ERRORS.inc(ticker, result.get("stage", "unknown"), result.get("error_type", "Exception"))
+
+
+def server_timing(timings, **extra):
+    # {단계: 초} -> Server-Timing 헤더 값 (밀리초)
+    items = {**timings, **extra}
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in items.items())
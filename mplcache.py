@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+
+# 서버리스 콜드 스타트에서 matplotlib 이 글꼴 목록 캐시(fontlist-v*.json)를 새로 만드는 시간(수 초)을 없앤다
+# mplconfig/ 에 matplotlib 동봉 글꼴만으로 만든 캐시를 넣어 두고 함수 번들에 포함한다 (vercel.json includeFiles)
+# 함수의 파일 시스템은 /tmp 만 쓸 수 있으므로 시작할 때 install() 이 그 캐시를 /tmp 의 MPLCONFIGDIR 로 복사한다
+#   python mplcache.py   # matplotlib 버전을 올리면 다시 생성 (파일 이름에 캐시 버전이 있어 맞지 않으면 무시되고 새로 만든다)
+
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mplconfig")
+
+
+def install(target=None):
+    # matplotlib 임포트 전에 호출. MPLCONFIGDIR 가 이미 지정돼 있으면 그대로 쓴다 -> 설정 디렉터리
+    if os.environ.get("MPLCONFIGDIR"):
+        return os.environ["MPLCONFIGDIR"]
+    target = target or os.path.join(tempfile.gettempdir(), "matplotlib")
+    os.makedirs(target, exist_ok=True)
+    if os.path.isdir(BUNDLED_DIR):
+        for name in os.listdir(BUNDLED_DIR):
+            if name.startswith("fontlist-") and not os.path.exists(os.path.join(target, name)):
+                shutil.copyfile(os.path.join(BUNDLED_DIR, name), os.path.join(target, name))
+    os.environ["MPLCONFIGDIR"] = target
+    return target
+
+
+def build(directory=BUNDLED_DIR):
+    # matplotlib 에 들어 있는 글꼴만 남긴 캐시. 그 경로는 matplotlib 데이터 경로 기준 상대 경로로 저장되므로
+    # 다른 설치(함수 번들의 site-packages)에서도 그대로 유효하다 (시스템 글꼴은 함수 환경에 없다)
+    import matplotlib
+    from matplotlib import font_manager
+
+    data = os.path.join(matplotlib.get_data_path(), "")
+    manager = font_manager.FontManager()
+    manager.ttflist = [font for font in manager.ttflist if font.fname.startswith(data)]
+    manager.afmlist = [font for font in manager.afmlist if font.fname.startswith(data)]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"fontlist-v{font_manager.FontManager.__version__}.json")
+    font_manager.json_dump(manager, path)
+    return path
+
+
+if __name__ == "__main__":
+    print(build())
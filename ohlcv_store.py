@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 사이 잠금 없음 (한 프로세스만 쓸 때만 안전)
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+# 심볼별 OHLCV 를 컬럼마다 원시 바이너리 파일로 보관하고 np.memmap 으로 복사 없이 읽는다
+# <root>/<interval>/<symbol>/{index,Open,...}[.<세대>].bin + meta.json (행 수, 컬럼 dtype, 타임존, 세대, 받은 구간 시작)
+# 새 바는 파일 끝에 덧붙인다. 마지막 바 수정과 앞쪽 이력 보충은 이미 읽어 간 프레임(memmap)이 바뀌지 않도록
+# 전체를 새 세대 파일로 다시 쓰고 meta 를 바꾼 뒤 이전 세대 파일을 지운다 (열려 있는 맵은 그대로 유효)
+# 프로세스 풀 워커, cold 프로파일 프로세스, 여러 uvicorn 워커가 같은 디렉터리를 쓰므로 심볼 디렉터리의 .lock 파일을
+# flock 으로 잠근다: 쓰기는 배타, 읽기(meta 와 맵 열기)는 공유 - 읽는 사이 그 세대 파일이 지워지지 않는다
+
+COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+class OhlcvStore:
+    def __init__(self, root):
+        self.root = root
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, interval, quote(symbol, safe=""))
+
+    def _lock(self, symbol, interval):
+        with self._locks_lock:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    @contextmanager
+    def _locked(self, symbol, interval, shared=False):
+        # 같은 프로세스의 스레드는 threading.Lock, 다른 프로세스와는 .lock 파일의 flock
+        directory = self._dir(symbol, interval)
+        with self._lock(symbol, interval):
+            if fcntl is None or (shared and not os.path.isdir(directory)):
+                yield
+                return
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, ".lock"), "a+b") as f:
+                fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                yield
+
+    def meta(self, symbol, interval="1d"):
+        path = os.path.join(self._dir(symbol, interval), "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, directory, meta):
+        tmp = os.path.join(directory, f"meta.json.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, "meta.json"))
+
+    def _path(self, directory, name, generation):
+        return os.path.join(directory, f"{name}.bin" if not generation else f"{name}.{generation}.bin")
+
+    def _column(self, directory, meta, name, dtype):
+        rows = meta["rows"]
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(directory, name, meta.get("generation", 0)), dtype=dtype, mode="r", shape=(rows,))
+
+    def _append(self, directory, meta, name, values):
+        # meta 의 행 수 뒤에 이어 쓴다 (이전에 쓰다 만 꼬리가 있으면 덮어씀)
+        path = self._path(directory, name, meta.get("generation", 0))
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(meta["rows"] * values.itemsize)
+            f.write(values.tobytes())
+
+    def _rewrite(self, directory, meta, raw, columns):
+        # 전체 구간을 새 세대 파일로 쓰고 meta 를 바꾼 뒤 이전 세대 파일을 지운다
+        old = meta.get("generation", 0)
+        generation = old + 1
+        raw.astype("i8").tofile(self._path(directory, "index", generation))
+        for name, dtype in meta["columns"].items():
+            columns[name].astype(dtype).tofile(self._path(directory, name, generation))
+        meta["rows"] = len(raw)
+        meta["generation"] = generation
+        self._write_meta(directory, meta)
+        for name in ["index", *meta["columns"]]:
+            try:
+                os.remove(self._path(directory, name, old))
+            except OSError:
+                pass
+
+    def last_timestamp(self, symbol, interval="1d"):
+        with self._locked(symbol, interval, shared=True):
+            meta = self.meta(symbol, interval)
+            if not meta or meta["rows"] == 0:
+                return None
+            index = self._column(self._dir(symbol, interval), meta, "index", "i8")
+            return self._timestamps(index[-1:], meta["tz"])[0]
+
+    def first_timestamp(self, symbol, interval="1d"):
+        # 받아 둔 구간의 시작: 보충할 때 요청한 시작 시각(그보다 앞에는 데이터가 없었음), 없으면 저장된 첫 바
+        with self._locked(symbol, interval, shared=True):
+            meta = self.meta(symbol, interval)
+            if not meta or meta["rows"] == 0:
+                return None
+            index = self._column(self._dir(symbol, interval), meta, "index", "i8")
+            first = self._timestamps(index[:1], meta["tz"])[0]
+        start = meta.get("start")
+        return min(first, pd.Timestamp(start)) if start else first
+
+    def _timestamps(self, values, tz):
+        index = pd.DatetimeIndex(values.astype("datetime64[ns]"), name="Date")
+        return index.tz_localize("UTC").tz_convert(tz) if tz else index
+
+    def read(self, symbol, interval="1d", since=None):
+        # 메모리 맵 배열을 그대로 감싼 프레임 (since 이후 구간만, 복사 없음)
+        with self._locked(symbol, interval, shared=True):
+            meta = self.meta(symbol, interval)
+            if not meta or meta["rows"] == 0:
+                return None
+            directory = self._dir(symbol, interval)
+            raw_index = self._column(directory, meta, "index", "i8")
+            columns = {name: self._column(directory, meta, name, dtype) for name, dtype in meta["columns"].items()}
+        start = 0
+        if since is not None:
+            since = pd.Timestamp(since)
+            if meta["tz"]:
+                since = since.tz_localize(meta["tz"]) if since.tzinfo is None else since
+                since = since.tz_convert("UTC").tz_localize(None)
+            elif since.tzinfo is not None:
+                since = since.tz_localize(None)
+            start = int(np.searchsorted(raw_index, since.value))
+        columns = {name: values[start:] for name, values in columns.items()}
+        return pd.DataFrame(columns, index=self._timestamps(raw_index[start:], meta["tz"]), copy=False)
+
+    def write(self, symbol, df, interval="1d", start=None):
+        # 저장된 첫 바보다 오래된 행은 앞에 보충, 저장 구간 안의 행은 무시(마지막 바와 같은 시각이면 수정), 이후는 덧붙임
+        # start: df 를 받을 때 요청한 구간의 시작 (그 앞은 받은 것으로 기록해 다시 보충하지 않는다)
+        df = df[[col for col in COLUMNS if col in df.columns]].dropna(how="all")
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else None
+        raw = (index.tz_convert("UTC").tz_localize(None) if tz else index).as_unit("ns").asi8
+
+        directory = self._dir(symbol, interval)
+        if df.empty and self.meta(symbol, interval) is None:
+            return
+        with self._locked(symbol, interval):
+            meta = self.meta(symbol, interval)
+            meta = meta or {
+                "rows": 0,
+                "tz": tz,
+                "columns": {col: "f8" for col in df.columns},
+            }
+            if start is not None:
+                start = str(pd.Timestamp(start))
+                meta["start"] = min(meta.get("start") or start, start, key=pd.Timestamp)
+            rows = meta["rows"]
+            stored = self._column(directory, meta, "index", "i8")
+            first, last = (stored[0], stored[-1]) if rows else (None, None)
+
+            def values(part, name, dtype):
+                return part[name].to_numpy(dtype=dtype) if name in part.columns else np.full(len(part), np.nan, dtype=dtype)
+
+            head = raw < first if rows else np.zeros(len(raw), dtype=bool)
+            revise = rows and raw.size and (raw == last).any()
+            tail = raw > last if rows else np.ones(len(raw), dtype=bool)
+            if head.any() or revise:
+                # 이미 내준 맵을 건드리지 않도록 새 세대로 다시 쓴다
+                keep = slice(0, rows - 1) if revise else slice(0, rows)
+                columns = {}
+                for name, dtype in meta["columns"].items():
+                    parts = [values(df[head], name, dtype), np.asarray(self._column(directory, meta, name, dtype))[keep]]
+                    if revise:
+                        parts.append(values(df[raw == last].iloc[-1:], name, dtype))
+                    parts.append(values(df[tail], name, dtype))
+                    columns[name] = np.concatenate(parts)
+                index_parts = [raw[head], np.asarray(stored)[keep]] + ([np.array([last])] if revise else []) + [raw[tail]]
+                self._rewrite(directory, meta, np.concatenate(index_parts), columns)
+                return
+
+            df, raw = df[tail], raw[tail]
+            if raw.size:
+                self._append(directory, meta, "index", raw.astype("i8"))
+                for name, dtype in meta["columns"].items():
+                    self._append(directory, meta, name, values(df, name, dtype))
+                meta["rows"] = rows + len(raw)
+            # meta 의 행 수를 마지막에 바꾸므로, 중간에 실패해도 읽는 쪽은 이전 구간만 본다
+            self._write_meta(directory, meta)
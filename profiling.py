@@ -0,0 +1,129 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from analysis import analysis_slot, run_analysis, run_isolated
+from metrics import StageTimer
+
+# /analyze?profile=warm|cold : 스냅샷을 거치지 않고 그 요청에서 직접 분석을 cProfile + tracemalloc 으로 돌린다
+# PROFILE_ENABLED=1 일 때만 허용. .prof 파일은 PROFILE_DIR 에 남기므로 snakeviz/flameprof 등으로 flamegraph 를 볼 수 있다
+# cold: 빈 프레임 캐시/지표 상태/차트 템플릿으로 시작하는 별도 프로세스에서 다운로드, Figure 생성, 렌더링까지 포함해서 측정
+#       (서비스 중인 캐시와 스냅샷은 그대로 두므로 운영 중에도 다른 요청이 느려지지 않는다)
+
+PROFILE_ENABLED = os.environ.get("PROFILE_ENABLED") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "btc_yun_profiles")
+# cProfile 보고서의 함수 수 / 단계별 할당 위치 수
+PROFILE_TOP = 30
+ALLOCATION_TOP = 10
+
+# cProfile/tracemalloc 은 프로세스 전역이므로 프로파일링은 한 번에 하나씩
+_profile_lock = threading.Lock()
+
+
+def _site(frame):
+    # site-packages 경로는 길어서 패키지/모듈:줄 만 남긴다
+    parts = os.path.normpath(frame.filename).split(os.sep)
+    return f"{os.sep.join(parts[-3:])}:{frame.lineno}"
+
+
+class StageAllocations:
+    # 분석 단계마다 시작/끝 스냅샷을 떠 두고, 단계 안에서 늘어난 할당 위치와 단계별 최대 메모리를 모은다
+    # 스냅샷 비교(파이썬 코드라 느림)는 프로파일링이 끝난 뒤 report() 에서 해 cProfile 보고서에 섞이지 않게 함
+    # (다른 스레드의 백그라운드 갱신은 무시)
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.pairs = []
+        self.stages = {}
+        self.peak = 0
+        self._before = None
+        self._base = 0
+
+    def __call__(self, name, event):
+        if threading.get_ident() != self.thread:
+            return
+        if event == "start":
+            self._before = tracemalloc.take_snapshot()
+            self._base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak = max(self.peak, peak)
+        stage = self.stages.setdefault(name, {"peak_mb": 0.0, "sites": {}})
+        stage["peak_mb"] = max(stage["peak_mb"], (peak - self._base) / 2 ** 20)
+        self.pairs.append((name, self._before, tracemalloc.take_snapshot()))
+        self._before = None
+
+    def report(self, top=ALLOCATION_TOP):
+        for name, before, after in self.pairs:
+            sites = self.stages[name]["sites"]
+            for stat in after.compare_to(before, "lineno"):
+                frame = stat.traceback[0]
+                # 앞 스냅샷 자체가 차지한 메모리는 제외
+                if stat.size_diff > 0 and frame.filename != tracemalloc.__file__:
+                    site = sites.setdefault(_site(frame), [0, 0])
+                    site[0] += stat.size_diff
+                    site[1] += stat.count_diff
+        self.pairs = []
+        return {
+            name: {
+                "peak_mb": round(stage["peak_mb"], 3),
+                "top": [
+                    {"site": site, "kb": round(size / 1024, 1), "count": count}
+                    for site, (size, count) in sorted(stage["sites"].items(), key=lambda item: -item[1][0])[:top]
+                ],
+            }
+            for name, stage in self.stages.items()
+        }
+
+
+def profile_call(fn, *args, **kwargs):
+    # fn 을 현재 스레드에서 실행하며 프로파일링. (결과, 보고서) 를 돌려준다
+    with _profile_lock:
+        allocations = StageAllocations(threading.get_ident())
+        profiler = cProfile.Profile()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        StageTimer.listener = allocations
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+            allocations.peak = max(allocations.peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            StageTimer.listener = None
+            if not tracing:
+                tracemalloc.stop()
+        elapsed = time.perf_counter() - start
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"analyze-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+    profiler.dump_stats(path)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats("cumulative").print_stats(PROFILE_TOP)
+    return result, {
+        "file": path,
+        "seconds": round(elapsed, 3),
+        "peak_mb": round(allocations.peak / 2 ** 20, 3),
+        "stages": allocations.report(),
+        "cpu": stream.getvalue(),
+    }
+
+
+def profile_analysis(cold=False, **params):
+    # cProfile 은 호출한 스레드만 보므로 분석은 sequential 로 (프로파일러 오버헤드 때문에 시간은 평소보다 길다)
+    with analysis_slot():
+        if cold:
+            result, report = run_isolated(profile_call, run_analysis, executor="sequential", **params)
+        else:
+            result, report = profile_call(run_analysis, executor="sequential", **params)
+    return dict(result, profile=report)
@@ -0,0 +1,155 @@
+import os
+import re
+import threading
+import time
+import zlib
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+# 분석기가 시세를 받는 통로. download(symbols, period=..., start=...) -> {symbol: OHLCV 프레임}
+# YFinanceProvider: 실제 yfinance / FileProvider: 기록해 둔 CSV 또는 심볼별 고정 시드의 합성 데이터 (네트워크 없음)
+
+# 합성 데이터의 마지막 날짜 (실행 시점과 무관하게 같은 결과가 나오도록 고정)
+SYNTHETIC_END = "2025-12-31"
+
+
+def period_start(end, period):
+    # yfinance period 문자열("5d", "6mo", "1y" ...)이 가리키는 구간의 시작 시각 ("max" 등은 전체)
+    # 날짜 범위를 벗어날 만큼 긴 기간도 전체로 본다 (예외 대신 None)
+    match = re.fullmatch(r"(\d+)(d|mo|y)", period or "")
+    if match is None:
+        return None
+    unit = {"d": "days", "mo": "months", "y": "years"}[match.group(2)]
+    try:
+        return end - pd.DateOffset(**{unit: int(match.group(1))})
+    except (ValueError, OverflowError):
+        return None
+
+
+def period_years(period):
+    # period 문자열이 가리키는 길이(년, 대략). "max" 등은 None
+    match = re.fullmatch(r"(\d+)(d|mo|y)", period or "")
+    if match is None:
+        return None
+    return int(match.group(1)) / {"d": 365, "mo": 12, "y": 1}[match.group(2)]
+
+
+def split_batch(data, symbols):
+    # 다중 심볼 프레임(Price, Ticker)을 심볼별로 나누고, 다른 시장 달력 때문에 생긴 빈 행은 버린다
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {symbols[0]: data}
+    tickers = set(data.columns.get_level_values(1))
+    return {
+        symbol: data.xs(symbol, axis=1, level=1).dropna(how="all")
+        for symbol in symbols if symbol in tickers
+    }
+
+
+class YFinanceProvider:
+    def download(self, symbols, period=None, start=None, interval="1d"):
+        import yfinance as yf
+
+        span = {"start": start} if start is not None else {"period": period}
+        data = yf.download(symbols, interval=interval, progress=False, group_by="column", **span)
+        return split_batch(data, symbols)
+
+
+class FileProvider:
+    # <root>/<interval>/<symbol>.csv 를 읽고, 파일이 없으면 (synthetic=True 일 때) 합성 시세를 만든다
+    # latency: download 호출마다 넣는 지연(초) - 네트워크 왕복을 흉내 내 성능 측정에 사용
+
+    def __init__(self, root=None, latency=0.0, synthetic=True, end=SYNTHETIC_END, years=2):
+        self.root = root
+        self.latency = latency
+        self.synthetic = synthetic
+        self.end = pd.Timestamp(end)
+        self.years = years
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # 프로세스 풀 워커로 넘길 때는 설정만 (읽어 둔 프레임과 잠금은 워커에서 새로)
+        return {key: value for key, value in self.__dict__.items() if key not in ("_frames", "_lock")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def path(self, symbol, interval="1d"):
+        return os.path.join(self.root, interval, f"{quote(symbol, safe='')}.csv")
+
+    def frame(self, symbol, interval="1d"):
+        key = (symbol, interval)
+        with self._lock:
+            if key not in self._frames:
+                df = None
+                if self.root and os.path.exists(self.path(symbol, interval)):
+                    df = pd.read_csv(self.path(symbol, interval), index_col=0, parse_dates=True)
+                    df.index.name = "Date"
+                elif self.synthetic:
+                    df = synthetic_frame(symbol, self.end, self.years, interval)
+                self._frames[key] = df
+            return self._frames[key]
+
+    def download(self, symbols, period=None, start=None, interval="1d"):
+        if self.latency:
+            time.sleep(self.latency)
+        frames = {}
+        for symbol in symbols:
+            df = self.frame(symbol, interval)
+            if df is None or df.empty:
+                continue
+            begin = pd.Timestamp(start) if start is not None else period_start(df.index[-1], period)
+            if begin is not None:
+                if df.index.tz is not None and begin.tzinfo is None:
+                    begin = begin.tz_localize(df.index.tz)
+                df = df[df.index >= begin]
+            frames[symbol] = df.copy()
+        return frames
+
+
+def save_frames(root, frames, interval="1d"):
+    # 받은 프레임을 FileProvider 가 읽는 형식으로 기록 (오프라인 재현용)
+    os.makedirs(os.path.join(root, interval), exist_ok=True)
+    for symbol, df in frames.items():
+        df.to_csv(os.path.join(root, interval, f"{quote(symbol, safe='')}.csv"))
+
+
+# yfinance interval -> (pandas 주기, 바 하나의 분)
+INTERVALS = {
+    "1m": ("min", 1), "2m": ("2min", 2), "5m": ("5min", 5), "15m": ("15min", 15),
+    "30m": ("30min", 30), "60m": ("h", 60), "1h": ("h", 60), "1d": ("D", 1440),
+}
+
+
+def synthetic_frame(symbol, end, years=2, interval="1d"):
+    # 심볼 이름을 시드로 한 로그 정규 랜덤워크. BTC 등 -USD 는 24시간 매일, 나머지는 평일(분봉은 09:00~15:30)만
+    end = pd.Timestamp(end)
+    start = end - pd.DateOffset(years=years)
+    freq, minutes = INTERVALS[interval]
+    if symbol.endswith("-USD"):
+        index = pd.date_range(start, end, freq=freq)
+    elif interval == "1d":
+        index = pd.bdate_range(start, end)
+    else:
+        index = pd.date_range(start, end, freq=freq)
+        clock = index.hour * 60 + index.minute
+        index = index[(index.dayofweek < 5) & (clock >= 9 * 60) & (clock < 15 * 60 + 30)]
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015 * np.sqrt(minutes / 1440), len(index))))
+    spread = np.abs(rng.normal(0, 0.005, len(index)))
+    open_ = close * (1 + rng.normal(0, 0.003, len(index)))
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + spread),
+            "Low": np.minimum(open_, close) * (1 - spread),
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(1_000, 10_000, len(index)).astype(float),
+        },
+        index=pd.DatetimeIndex(index, name="Date"),
+    )
@@ -0,0 +1,268 @@
+import argparse
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis import MACRO_SYMBOLS, WARMUP_BARS, load, load_watchlist, prefetch, slope_array
+from backtest import COST, PERIOD, evaluate
+
+# 신호 규칙의 창 길이/임계값 조합(그리드)을 관심 종목 전체에 백테스트해 순위표를 만든다
+# 종목마다 종가/거래량/수익률의 누적합을 한 번만 만들어 두고, 어떤 창 길이의 이동평균/표준편차도 누적합의 차로 구한다
+# 조합은 프로세스 풀에 나눠 계산 (데이터는 워커마다 한 번만 전달)
+#   python sweep.py --period 5y --top 20 --output sweep.csv
+# RSI 길이는 차트에만 쓰이고 신호에 들어가지 않으므로 그리드에 없다
+
+GRID = {
+    "ma_short": [10, 20, 30],        # MA20 (추세 기울기, DXY/TNX 단기 평균)
+    "ma_long": [40, 60, 90],         # MA60 (DXY/SPX/기준 지수 장기 평균)
+    "slope_window": [3, 5, 10],      # MA20_Slope 창
+    "vol_ratio": [1.1, 1.3, 1.5],    # 거래량 / 20일 평균 거래량 임계값
+    "vol_window": [5, 10, 20],       # SPX 변동성 창 (BTC 매크로)
+    "score_cut": [1, 2, 3],          # 매수에 필요한 매크로 점수
+}
+DEFAULTS = {"ma_short": 20, "ma_long": 60, "slope_window": 5, "vol_ratio": 1.3, "vol_window": 10, "score_cut": 2}
+RANK_BY = "sharpe"
+# 프로세스 풀에 한 번에 넘기는 조합 수
+CHUNK_SIZE = 16
+# 매크로 점수 계산 시작 위치 (macro_score 와 같게)
+START = WARMUP_BARS
+
+_data = None
+_memo = {}
+
+
+def _cumsum(values):
+    # NaN 을 0 으로 본 누적합과 유효 개수의 누적합 (앞에 0 을 붙여 창 합 = cs[t+1] - cs[t+1-w])
+    valid = ~np.isnan(values)
+    return (np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))]),
+            np.concatenate([[0], np.cumsum(valid)]))
+
+
+def _window_sum(cs, window):
+    out = np.full(len(cs) - 1, np.nan)
+    if len(out) >= window:
+        out[window - 1:] = cs[window:] - cs[:-window]
+    return out
+
+
+def _shift(values, n):
+    out = np.full(len(values), np.nan)
+    if n < len(values):
+        out[n:] = values[:len(values) - n]
+    return out
+
+
+def _prepare_series(df):
+    close = df["Close"].to_numpy(dtype=float)
+    volume = df["Volume"].to_numpy(dtype=float)
+    ret = _shift(close, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = close / ret - 1
+    return {
+        "close": close,
+        "close_cs": _cumsum(close),
+        "volume_cs": _cumsum(volume),
+        "volume": volume,
+        "ret_cs": _cumsum(ret),
+        "ret2_cs": _cumsum(ret ** 2),
+    }
+
+
+def _memoized(key, fn):
+    if key not in _memo:
+        _memo[key] = fn()
+    return _memo[key]
+
+
+def _mean(symbol, column, window):
+    # pandas rolling(window).mean() 과 같이 창 안에 NaN 이 있으면 NaN
+    def compute():
+        cs, count = _data["series"][symbol][f"{column}_cs"]
+        with np.errstate(invalid="ignore"):
+            return np.where(_window_sum(count, window) == window, _window_sum(cs, window) / window, np.nan)
+    return _memoized(("mean", symbol, column, window), compute)
+
+
+def _std(symbol, window):
+    # 수익률의 rolling(window).std() (ddof=1)
+    def compute():
+        s1, count = _data["series"][symbol]["ret_cs"]
+        s2, _ = _data["series"][symbol]["ret2_cs"]
+        total, total2 = _window_sum(s1, window), _window_sum(s2, window)
+        with np.errstate(invalid="ignore"):
+            var = np.maximum(total2 - total ** 2 / window, 0.0) / (window - 1)
+        return np.where(_window_sum(count, window) == window, np.sqrt(var), np.nan)
+    return _memoized(("std", symbol, window), compute)
+
+
+def _macro_parts(kind, baseline, p):
+    def close(symbol):
+        return _data["series"][symbol]["close"]
+
+    with np.errstate(invalid="ignore"):
+        if kind == "btc":
+            dxy_long = _mean("DX-Y.NYB", "close", p["ma_long"])
+            tnx_short = _mean("^TNX", "close", p["ma_short"])
+            spx_vol = _std("^GSPC", p["vol_window"])
+            return {
+                "DX-Y.NYB": (_mean("DX-Y.NYB", "close", p["ma_short"]) < dxy_long) & (slope_array(dxy_long, 10) < 0),
+                "^TNX": tnx_short < _shift(tnx_short, 5),
+                "^GSPC": (close("^GSPC") > _mean("^GSPC", "close", p["ma_long"])) & (spx_vol < _shift(spx_vol, 5)),
+            }
+        return {
+            "DX-Y.NYB": close("DX-Y.NYB") < _shift(close("DX-Y.NYB"), 5),
+            "^TNX": close("^TNX") < _shift(close("^TNX"), 5),
+            baseline: close(baseline) > _mean(baseline, "close", p["ma_long"]),
+        }
+
+
+def _signals(ticker, p):
+    # analysis.btc_signals / stock_signals 와 같은 규칙을 배열로. -> (매수, 매도) bool 배열 (병합된 행만)
+    info = _data["tickers"][ticker]
+    rows = info["rows"]
+    parts = _memoized(("macro", info["kind"], info["baseline"], p["ma_short"], p["ma_long"], p["vol_window"]),
+                      lambda: _macro_parts(info["kind"], info["baseline"], p))
+    score = sum(parts[symbol][pos] for symbol, pos in info["pad"].items())
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = _data["series"][ticker]["volume"] / _mean(ticker, "volume", 20)
+    internal = (ratio > p["vol_ratio"])[rows]
+    # Internal_Strong: 직전 바와 합쳐 한 번이라도 (첫 행은 rolling(2) 가 NaN 이라 False)
+    strong = np.zeros(len(internal), dtype=bool)
+    strong[1:] = internal[1:] | internal[:-1]
+    slope = _memoized(("slope", ticker, p["ma_short"], p["slope_window"]),
+                      lambda: slope_array(_mean(ticker, "close", p["ma_short"]), p["slope_window"]))[rows]
+
+    with np.errstate(invalid="ignore"):
+        buy = (score >= p["score_cut"]) & strong & (slope > 0)
+        sell = score <= p["score_cut"] - 1
+        if info["kind"] != "btc":
+            sell &= slope < 0
+    return buy, sell
+
+
+def _init_worker(data):
+    global _data
+    _data = data
+    _memo.clear()
+
+
+def _evaluate_chunk(combos, cost):
+    prices, dates = _data["prices"], _data["dates"]
+    rows = []
+    for p in combos:
+        buy = np.zeros(prices.shape, dtype=bool)
+        sell = np.zeros(prices.shape, dtype=bool)
+        for j, ticker in enumerate(_data["order"]):
+            b, s = _signals(ticker, p)
+            panel_rows = _data["tickers"][ticker]["panel_rows"]
+            buy[panel_rows, j] = b
+            sell[panel_rows, j] = s
+        metrics, _ = evaluate(prices, buy, sell, dates, cost)
+        with np.errstate(invalid="ignore"):
+            rows.append({
+                **p,
+                "sharpe": np.nanmean(metrics["sharpe"]),
+                "total_return": np.nanmean(metrics["total_return"]),
+                "annual_return": np.nanmean(metrics["annual_return"]),
+                "max_drawdown": np.nanmin(metrics["max_drawdown"]),
+                "hit_rate": np.nanmean(metrics["hit_rate"]),
+                "trades": int(metrics["trades"].sum()),
+                "turnover": np.nanmean(metrics["turnover"]),
+            })
+    return rows
+
+
+def prepare(watchlist=None, period=PERIOD):
+    # 그리드와 무관한 준비: 심볼별 누적합, 종목별 병합 행 위치와 매크로 as-of 위치, 날짜 합집합 위의 종가 패널
+    watchlist = load_watchlist() if watchlist is None else watchlist
+    symbols = MACRO_SYMBOLS + [s for ticker, _, baseline in watchlist for s in (ticker, baseline or "^GSPC")]
+    prefetch(symbols, period)
+    frames = {symbol: load(symbol, period) for symbol in dict.fromkeys(symbols)}
+
+    tickers = {}
+    closes = {}
+    for ticker, _, baseline in watchlist:
+        kind = "btc" if baseline is None else "stock"
+        macros = ["DX-Y.NYB", "^TNX", "^GSPC" if kind == "btc" else baseline]
+        if any(frames[s].empty for s in [ticker] + macros) or len(frames[ticker]) <= START:
+            print(f"{ticker}: 데이터 없음", file=sys.stderr)
+            continue
+        index = frames[ticker].index[START:]
+        pad = {s: frames[s].index.get_indexer(index, method="pad") for s in macros}
+        keep = np.logical_and.reduce([pos >= 0 for pos in pad.values()])
+        tickers[ticker] = {
+            "kind": kind,
+            "baseline": None if kind == "btc" else baseline,
+            "rows": np.flatnonzero(keep) + START,
+            "pad": {s: pos[keep] for s, pos in pad.items()},
+        }
+        closes[ticker] = frames[ticker]["Close"].iloc[START:][keep]
+
+    close = pd.DataFrame(closes).sort_index()
+    for ticker, series in closes.items():
+        tickers[ticker]["panel_rows"] = close.index.get_indexer(series.index)
+    used = {s for ticker, info in tickers.items() for s in [ticker, *info["pad"]]}
+    return {
+        "series": {s: _prepare_series(frames[s]) for s in used},
+        "tickers": tickers,
+        "order": list(close.columns),
+        "prices": close.to_numpy(dtype=float),
+        "dates": close.index.to_numpy(),
+    }
+
+
+def grid_combos(grid=None):
+    grid = grid or GRID
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def sweep(data, grid=None, workers=None, cost=COST, rank_by=RANK_BY):
+    # -> rank_by 내림차순(낙폭은 덜 깊은 순) 순위표
+    combos = grid_combos(grid)
+    chunks = [combos[i:i + CHUNK_SIZE] for i in range(0, len(combos), CHUNK_SIZE)]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        _init_worker(data)
+        rows = [row for chunk in chunks for row in _evaluate_chunk(chunk, cost)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+            rows = [row for result in pool.map(_evaluate_chunk, chunks, itertools.repeat(cost)) for row in result]
+    table = pd.DataFrame(rows).sort_values(rank_by, ascending=False, na_position="last").reset_index(drop=True)
+    table.index += 1
+    table.index.name = "rank"
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="신호 파라미터 그리드 스윕")
+    parser.add_argument("--period", default=PERIOD)
+    parser.add_argument("--cost", type=float, default=COST)
+    parser.add_argument("--watchlist", help="관심 종목 csv (ticker,name,baseline)")
+    parser.add_argument("--workers", type=int, help="프로세스 수 (기본: CPU 수, 1 이면 현재 프로세스에서)")
+    parser.add_argument("--rank-by", default=RANK_BY,
+                        choices=["sharpe", "total_return", "annual_return", "max_drawdown", "hit_rate"])
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", help="전체 순위표 csv 경로")
+    args = parser.parse_args(argv)
+
+    watchlist = load_watchlist(args.watchlist) if args.watchlist else None
+    data = prepare(watchlist, args.period)
+    if not data["order"]:
+        print("신호를 계산한 종목이 없습니다", file=sys.stderr)
+        return 1
+    table = sweep(data, workers=args.workers, cost=args.cost, rank_by=args.rank_by)
+    if args.output:
+        table.to_csv(args.output)
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(table.head(args.top).round(4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
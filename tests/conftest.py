@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 최상위 모듈(analysis, providers ...)을 그대로 임포트
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import SUMMARY_COLUMNS, backtest, positions
+
+# 손으로 계산한 작은 패널로 포지션/거래별 적중률/회전율/노출/낙폭을 확인
+# A: 0 매수 -> 2 매도, 3 매수와 매도가 같은 바(청산 우선이라 진입 안 함), 4 매수 후 끝까지 보유(열린 거래, 손실)
+# B: 0 은 거래 없음, 2 는 가격이 없는 날이라 그날의 매도는 무시, 4 매도 (거래 하나, 손실)
+
+COST = 0.01
+DATES = pd.date_range("2024-01-01", periods=6, freq="D")
+
+
+@pytest.fixture
+def panel():
+    close = pd.DataFrame({
+        "A": [100.0, 110.0, 121.0, 110.0, 100.0, 99.0],
+        "B": [np.nan, 50.0, np.nan, 55.0, 44.0, 44.0],
+    }, index=DATES)
+    buy = pd.DataFrame({"A": [1, 0, 0, 1, 1, 0], "B": [0, 1, 0, 0, 0, 0]}, index=DATES).astype(bool)
+    sell = pd.DataFrame({"A": [0, 0, 1, 1, 0, 0], "B": [0, 0, 1, 0, 1, 0]}, index=DATES).astype(bool)
+    return close, buy, sell
+
+
+def test_positions_exit_wins_on_same_bar():
+    buy = np.array([[1], [0], [0], [1], [1], [0]], dtype=bool)
+    sell = np.array([[0], [0], [1], [1], [0], [0]], dtype=bool)
+    assert positions(buy, sell)[:, 0].tolist() == [1, 1, 0, 0, 1, 1]
+
+
+def _sharpe(strat, years):
+    strat = np.array(strat)
+    return strat.mean() / strat.std(ddof=1) * np.sqrt(len(strat) / years)
+
+
+def test_summary_matches_hand_computation(panel):
+    summary, equity = backtest(*panel, cost=COST)
+    assert list(summary.columns) == SUMMARY_COLUMNS
+
+    # A: 보유 [0,1,1,0,0,1], 바 수익 [-1%(진입 비용), 10%, 10%-1%(청산 비용), 0, -1%(진입 비용), -1%]
+    a_strat = [-0.01, 0.10, 0.09, 0.0, -0.01, -0.01]
+    a_equity = np.cumprod(1 + np.array(a_strat))
+    a_years = 5 / 365.25
+    # B: 1 진입(비용), 3 +10%, 4 -20% 와 청산 비용. 가격이 없는 0, 2 번 바는 샤프 지수에서 빠진다
+    b_strat = [0.0, -0.01, 0.0, 0.10, -0.21, 0.0]
+    b_equity = np.cumprod(1 + np.array(b_strat))
+    b_years = 4 / 365.25
+
+    np.testing.assert_allclose(equity["A"], a_equity)
+    np.testing.assert_allclose(equity["B"], b_equity)
+    expected = pd.DataFrame({
+        "total_return": [0.163388501, -0.13969],
+        "annual_return": [1.163388501 ** (1 / a_years) - 1, 0.86031 ** (1 / b_years) - 1],
+        "max_drawdown": [0.9801 - 1, 0.79 - 1],
+        "sharpe": [_sharpe(a_strat, a_years), _sharpe([-0.01, 0.10, -0.21, 0.0], b_years)],
+        # A: 거래 두 번 (0~2 는 이익, 4~ 열린 거래는 0.99 * 0.99 로 손실), B: 한 번 (0.99 * 1.1 * 0.79 로 손실)
+        "trades": [2, 1],
+        "hit_rate": [0.5, 0.0],
+        # 진입/청산 횟수(A 3 번, B 2 번)를 연 단위로
+        "turnover": [3 / a_years, 2 / b_years],
+        # 보유 바 수 / 첫 거래일부터의 바 수
+        "exposure": [3 / 6, 3 / 5],
+    }, index=["A", "B"])
+    pd.testing.assert_frame_equal(summary, expected, check_dtype=False, rtol=1e-9)
+
+
+def test_no_trades_gives_nan_hit_rate(panel):
+    close, buy, sell = panel
+    summary, equity = backtest(close, buy & False, sell, cost=COST)
+    assert summary["trades"].tolist() == [0, 0]
+    assert summary["hit_rate"].isna().all()
+    assert (equity == 1).all().all()
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendars import calendar_for, sessions, valid_until
+
+# 세션 중(과 마감 후 SETTLE 동안)은 TTL, 그 밖에는 다음 개장 시각까지 - 시간대/야간 세션/서머타임 경계
+
+TTL = 300
+SEOUL = ZoneInfo("Asia/Seoul")
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def _utc(year, month, day, hour, minute, tz):
+    return datetime(year, month, day, hour, minute, tzinfo=tz).astimezone(timezone.utc)
+
+
+def _ttl(now):
+    return now + timedelta(seconds=TTL)
+
+
+def test_calendar_for():
+    assert calendar_for("BTC-USD") == "24/7"
+    assert calendar_for("005930.KS") == calendar_for("^KQ11") == "KRX"
+    assert calendar_for("DX-Y.NYB") == "ICE"
+    assert calendar_for("^TNX") == calendar_for("AAPL") == "NYSE"
+    assert calendar_for("^N225") is None and calendar_for("KRW=X") is None
+
+
+@pytest.mark.parametrize("symbol", ["BTC-USD", "^N225"])
+def test_always_ttl(symbol):
+    now = _utc(2025, 6, 7, 12, 0, SEOUL)
+    assert valid_until(symbol, now, TTL) == _ttl(now)
+
+
+@pytest.mark.parametrize("now", [
+    _utc(2025, 6, 6, 15, 50, SEOUL),   # 금요일 마감(15:30) + SETTLE 이후
+    _utc(2025, 6, 7, 12, 0, SEOUL),    # 토요일
+    _utc(2025, 6, 9, 8, 59, SEOUL),    # 월요일 개장 직전
+])
+def test_krx_weekend_waits_for_monday_open(now):
+    assert valid_until("005930.KS", now, TTL) == _utc(2025, 6, 9, 9, 0, SEOUL)
+
+
+def test_krx_session_and_settle():
+    for now in [_utc(2025, 6, 9, 9, 0, SEOUL), _utc(2025, 6, 9, 15, 44, SEOUL)]:
+        assert valid_until("^KS11", now, TTL) == _ttl(now)
+
+
+def test_ice_sunday_evening_open():
+    sunday_open = _utc(2025, 6, 8, 18, 0, NEW_YORK)
+    for now in [_utc(2025, 6, 7, 12, 0, NEW_YORK), _utc(2025, 6, 8, 17, 59, NEW_YORK)]:
+        assert valid_until("DX-Y.NYB", now, TTL) == sunday_open
+    assert valid_until("DX-Y.NYB", sunday_open, TTL) == _ttl(sunday_open)
+    # 월요일 세션은 일요일 저녁에 열린다
+    assert sessions("ICE", sunday_open, sunday_open + timedelta(hours=1)) == [
+        (sunday_open, _utc(2025, 6, 9, 17, 0, NEW_YORK))
+    ]
+
+
+def test_ice_daily_break():
+    # 17:00 마감 후 SETTLE 동안은 TTL, 그 뒤 18:00 재개장까지는 그대로
+    settle = _utc(2025, 6, 10, 17, 10, NEW_YORK)
+    assert valid_until("DX-Y.NYB", settle, TTL) == _ttl(settle)
+    assert valid_until("DX-Y.NYB", _utc(2025, 6, 10, 17, 20, NEW_YORK), TTL) == _utc(2025, 6, 10, 18, 0, NEW_YORK)
+    # 금요일 17:00 이후는 일요일 18:00 까지
+    assert valid_until("DX-Y.NYB", _utc(2025, 6, 13, 17, 20, NEW_YORK), TTL) == _utc(2025, 6, 15, 18, 0, NEW_YORK)
+
+
+def test_nyse_settle_window():
+    for now in [_utc(2025, 6, 11, 15, 59, NEW_YORK), _utc(2025, 6, 11, 16, 14, NEW_YORK)]:
+        assert valid_until("^GSPC", now, TTL) == _ttl(now)
+    assert valid_until("^GSPC", _utc(2025, 6, 11, 16, 15, NEW_YORK), TTL) == _utc(2025, 6, 12, 9, 30, NEW_YORK)
+
+
+@pytest.mark.parametrize("friday, monday_open_utc", [
+    # 서머타임 시작(3/9): 월요일 09:30 EDT = 13:30 UTC (금요일의 EST 기준이면 14:30)
+    ((2025, 3, 7), datetime(2025, 3, 10, 13, 30, tzinfo=timezone.utc)),
+    # 서머타임 끝(11/2): 월요일 09:30 EST = 14:30 UTC
+    ((2025, 10, 31), datetime(2025, 11, 3, 14, 30, tzinfo=timezone.utc)),
+])
+def test_nyse_open_across_dst(friday, monday_open_utc):
+    assert valid_until("AAPL", _utc(*friday, 17, 0, NEW_YORK), TTL) == monday_open_utc
+
+
+def test_ice_open_on_dst_sunday():
+    # 서머타임이 시작되는 일요일 18:00 EDT = 22:00 UTC
+    assert valid_until("DX-Y.NYB", _utc(2025, 3, 8, 12, 0, NEW_YORK), TTL) == datetime(2025, 3, 9, 22, 0, tzinfo=timezone.utc)
@@ -0,0 +1,25 @@
+import time
+
+import analysis
+from providers import FileProvider
+
+# 같은 버전의 차트 URL 은 다시 그려도 같은 PNG (ETag/immutable 캐시가 거짓이 되지 않게)
+
+
+def test_rerendered_chart_has_same_bytes():
+    previous = analysis._provider
+    analysis.set_provider(FileProvider(years=1))
+    try:
+        analysis.clear_charts()
+        first = analysis.run_analysis(executor="sequential", watchlist=analysis.WATCHLIST)
+        pngs = {}
+        for (ticker, *_), item in zip(analysis.WATCHLIST, first["results"]):
+            version = item["chart"].split("?")[0].rsplit("/", 1)[-1].removesuffix(".png")
+            pngs[ticker] = (version, analysis.get_chart(ticker, version))
+        # 제목에 분석 시각이 들어가면 초가 바뀐 뒤 다시 그린 그림이 달라진다
+        time.sleep(1.1)
+        analysis.clear_charts()
+        for ticker, (version, png) in pngs.items():
+            assert analysis.chart_png(ticker, version) == (version, png)
+    finally:
+        analysis.set_provider(previous)
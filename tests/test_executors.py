@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+import analysis
+from providers import FileProvider
+
+# 느린 다운로드가 진행 중일 때도 분석기/프로세스 풀이 그 잠금에 붙잡히지 않는지
+
+STALLED = "005930.KS"
+
+
+class StallingProvider(FileProvider):
+    # stall 심볼이 들어 있는 다운로드는 delay 초 멈춘다 (프로세스 풀 워커에서도 같은 동작)
+    # counts: 이 프로세스에서 심볼별로 받은 횟수
+    def __init__(self, stall=(), delay=0.0, **kwargs):
+        super().__init__(years=1, **kwargs)
+        self.stall = set(stall)
+        self.delay = delay
+        self.counts = Counter()
+
+    def download(self, symbols, **kwargs):
+        with self._lock:
+            self.counts.update(symbols)
+        if self.stall.intersection(symbols):
+            time.sleep(self.delay)
+        return super().download(symbols, **kwargs)
+
+
+@pytest.fixture
+def provider():
+    previous = analysis._provider
+
+    def use(**kwargs):
+        analysis.set_provider(StallingProvider(**kwargs))
+        return analysis._provider
+
+    yield use
+    # 워커가 멈춰 있어도 테스트가 끝나도록 풀의 프로세스를 먼저 정리
+    pool = analysis._process_pool
+    if pool is not None:
+        for process in list(pool._processes.values()):
+            process.kill()
+    analysis.shutdown_process_pool()
+    # 멈춰 있던 묶음 다운로드가 끝나 다음 테스트의 캐시에 프레임을 넣지 않도록 기다린 뒤 비운다
+    deadline = time.monotonic() + 10
+    while analysis._batches and time.monotonic() < deadline:
+        time.sleep(0.05)
+    analysis.set_provider(previous)
+
+
+def _wait_locked(key, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        lock = analysis._fetch_locks.get(key)
+        if lock is not None and lock.locked():
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"{key} was never locked")
+
+
+def _errors(result):
+    return {item["name"]: item["error"] for item in result["results"] if "error" in item}
+
+
+def test_process_pool_started_while_prefetch_holds_locks(provider):
+    # 다른 스레드가 STALLED 를 받는 중(잠금을 잡은 채)에 prefetch 제한 시간이 지나 풀이 처음 만들어져도
+    # 워커는 그 잠금을 물려받지 않는다 (물려받으면 그 워커의 load() 가 영영 멈추고 풀 전체가 막힌다)
+    provider(stall=[STALLED], delay=3)
+    analysis.shutdown_process_pool()
+    slow = threading.Thread(target=analysis.load, args=(STALLED,))
+    slow.start()
+    _wait_locked((STALLED, "1y", "1d"))
+    # 첫 분석은 prefetch 를 기다리지 않고 풀을 띄우는 것이 목적 (워커 기동이 제한 시간을 넘겨도 상관없다)
+    analysis.run_analysis(executor="process", mode="series", timeout=1.5, watchlist=analysis.WATCHLIST)
+    slow.join()
+    second = analysis.run_analysis(executor="process", mode="series", timeout=10, watchlist=analysis.WATCHLIST)
+    assert _errors(second) == {}
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_slow_symbol_only_delays_its_own_ticker(provider, executor):
+    # 한 묶음으로 받는 심볼 중 하나가 멈춰도 그 심볼이 필요 없는 종목은 제한 시간 안에 끝난다
+    provider(stall=[STALLED], delay=6)
+    if executor == "process":
+        # 워커 기동 시간은 빼고 잰다
+        analysis._get_process_pool().submit(int).result()
+    result = analysis.run_analysis(executor=executor, mode="series", timeout=4, watchlist=analysis.WATCHLIST)
+    assert _errors(result) == {STALLED: "timeout"}
+
+
+def test_killed_worker_does_not_break_later_runs(provider):
+    # OOM 등으로 워커 하나가 죽어 풀이 깨져도 다음 분석은 새 풀에서 정상으로 돈다
+    provider()
+    pool = analysis._get_process_pool()
+    pool.submit(int).result()
+    next(iter(pool._processes.values())).kill()
+    deadline = time.monotonic() + 10
+    while not pool._broken and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert pool._broken
+    result = analysis.run_analysis(executor="process", mode="series", timeout=30, watchlist=analysis.WATCHLIST)
+    assert _errors(result) == {}
+    assert analysis._process_pool is not pool
+
+
+def test_slow_batch_downloads_each_symbol_once(provider):
+    # 여러 심볼 다운로드가 수 초씩 걸려도 제한 시간이 넉넉하면 분석기는 묶음을 기다리고 같은 심볼을 다시 받지 않는다
+    counting = provider(latency=2)
+    watchlist = analysis.WATCHLIST + [
+        ("AAPL", "Apple", "^GSPC"), ("MSFT", "Microsoft", "^GSPC"), ("035720.KQ", "카카오", "^KQ11"),
+    ]
+    result = analysis.run_analysis(executor="thread", mode="series", timeout=30, watchlist=watchlist)
+    assert _errors(result) == {}
+    assert set(counting.counts.values()) == {1}
@@ -0,0 +1,32 @@
+import pytest
+
+import analysis
+from ohlcv_store import OhlcvStore
+from providers import FileProvider
+
+# 봉이 모자란 기간은 IndexError 대신 이유를 알려 주고, 저장소가 있어도 더 긴 기간은 앞부분을 보충해 분석된다
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    previous = analysis._provider
+    monkeypatch.setattr(analysis, "_store", OhlcvStore(str(tmp_path)))
+    analysis.set_provider(FileProvider(years=12))
+    yield
+    analysis.set_provider(previous)
+
+
+def _run(period):
+    result = analysis.run_analysis(executor="sequential", mode="series", interval="1mo", period=period,
+                                   watchlist=analysis.WATCHLIST)
+    return result["results"]
+
+
+def test_short_history_then_longer_period(store):
+    for item in _run("2y"):
+        assert item["error_type"] == "ValueError"
+        assert item["error"].startswith("not enough history for 1mo:")
+    analysis.clear_cache()
+    for item in _run("10y"):
+        assert "error" not in item
+        assert len(item["series"]["Close"]) == 20
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+from analysis import batch_indicators, indicators
+from providers import synthetic_frame
+
+# 증분 지표(IndicatorState)가 바를 하나씩 추가하고 마지막 바를 수정해도 전체 배치 계산과 같은지
+
+
+@pytest.fixture(autouse=True)
+def clear_states():
+    with analysis._states_lock:
+        analysis._states.clear()
+    yield
+    with analysis._states_lock:
+        analysis._states.clear()
+
+
+def _revised(df, factor=1.03):
+    df = df.copy()
+    df.iloc[-1, df.columns.get_loc("Close")] *= factor
+    df.iloc[-1, df.columns.get_loc("Volume")] += 500
+    return df
+
+
+def _assert_batch(df, got):
+    pd.testing.assert_frame_equal(batch_indicators(df), got.set_axis(df.index), check_names=False, check_freq=False,
+                                  rtol=1e-9, atol=1e-12)
+
+
+def _replay(key, df, start, revise_every=5):
+    # start 행으로 상태를 만든 뒤 한 바씩 추가, revise_every 바마다 마지막 바를 한 번 고쳤다가 되돌린다
+    indicators(key, df.iloc[:start])
+    for n in range(start + 1, len(df) + 1):
+        part = df.iloc[:n]
+        if n % revise_every == 0:
+            _assert_batch(_revised(part), indicators(key, _revised(part)))
+        got = indicators(key, part)
+    return got
+
+
+@pytest.mark.parametrize("symbol", ["BTC-USD", "^GSPC", "066570.KS"])
+def test_incremental_matches_batch(symbol):
+    df = synthetic_frame(symbol, "2025-12-31", 1)
+    _assert_batch(df, _replay(symbol, df, 100))
+    assert analysis._states[symbol][1].n == len(df)
+
+
+@pytest.mark.parametrize("start", [100, 151, 152, 171, 173])
+def test_incremental_matches_batch_across_missing_closes(start):
+    # 종가가 빠진 바 뒤에는 RSI 의 EWM 이 pandas 처럼 이전 값의 가중치를 줄여 이어져야 한다
+    df = synthetic_frame("005930.KS", "2025-12-31", 1)
+    df.iloc[[150, 170, 171, 200], df.columns.get_loc("Close")] = np.nan
+    _assert_batch(df, _replay("005930.KS", df, start))
+
+
+def test_changed_history_recomputes():
+    df = synthetic_frame("^KS11", "2025-12-31", 1)
+    indicators("^KS11", df.iloc[:200])
+    changed = df.copy()
+    changed.iloc[50, changed.columns.get_loc("Close")] *= 1.1
+    _assert_batch(changed, indicators("^KS11", changed))
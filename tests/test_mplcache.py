@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+import mplcache
+
+# 새 서버리스 인스턴스처럼 matplotlib 캐시가 없는 상태에서도 번들 글꼴 캐시를 /tmp 로 옮겨 써 다시 만들지 않는지
+
+CODE = """
+import logging, sys
+logging.basicConfig(level=logging.INFO)
+sys.path.insert(0, sys.argv[1])
+import mplcache
+print(mplcache.install())
+from matplotlib import font_manager
+font_manager.findfont("DejaVu Sans")
+"""
+
+
+def test_bundled_font_cache_is_used(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != "MPLCONFIGDIR"}
+    env.update(HOME=str(tmp_path), TMPDIR=str(tmp_path))
+    root = os.path.dirname(os.path.abspath(mplcache.__file__))
+    out = subprocess.run([sys.executable, "-c", CODE, root], capture_output=True, text=True, check=True, env=env)
+    target = out.stdout.strip().splitlines()[-1]
+    assert target == str(tmp_path / "matplotlib")
+    assert sorted(os.listdir(target)) == sorted(os.listdir(mplcache.BUNDLED_DIR))
+    assert "generated new fontManager" not in out.stderr
+    assert "not a writable directory" not in out.stderr
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import analysis
+from ohlcv_store import COLUMNS, OhlcvStore
+from providers import FileProvider, synthetic_frame
+
+# 저장소가 짧은 기간으로 먼저 받은 심볼의 앞부분을 보충하고, 이미 내준 프레임은 수정/보충 뒤에도 바뀌지 않는지
+
+
+def test_longer_period_backfills_head(tmp_path, monkeypatch):
+    provider = FileProvider(years=12)
+    monkeypatch.setattr(analysis, "_store", OhlcvStore(str(tmp_path)))
+    monkeypatch.setattr(analysis, "_provider", provider)
+    short = analysis._fetch(["^GSPC"], "1y")["^GSPC"]
+    long = analysis._fetch(["^GSPC"], "10y")["^GSPC"]
+    expected = provider.download(["^GSPC"], period="10y")["^GSPC"]
+    assert len(long) == len(expected) > len(short)
+    pd.testing.assert_frame_equal(long, analysis._normalize(expected, "1d"), check_freq=False, check_index_type=False)
+    # 보충한 구간은 다시 받지 않는다
+    calls = []
+    monkeypatch.setattr(provider, "download", lambda symbols, **kwargs: calls.append(kwargs) or {})
+    analysis._fetch(["^GSPC"], "5y")
+    assert calls == [{"start": str(expected.index[-1].date()), "interval": "1d"}]
+
+
+def test_revision_and_backfill_leave_read_frames_unchanged(tmp_path):
+    store = OhlcvStore(str(tmp_path))
+    df = synthetic_frame("^KS11", "2025-12-31", 2)
+    store.write("^KS11", df.iloc[300:400])
+    before = store.read("^KS11")
+    snapshot = before.copy()
+
+    revised = df.iloc[399:401].copy()
+    revised.iloc[0, revised.columns.get_loc("Close")] *= 1.05
+    store.write("^KS11", revised)
+    store.write("^KS11", df.iloc[100:300], start=df.index[100])
+    pd.testing.assert_frame_equal(before, snapshot)
+
+    after = store.read("^KS11")
+    assert len(after) == 301
+    assert after["Close"].iloc[299] == revised["Close"].iloc[0]
+    assert store.first_timestamp("^KS11") == df.index[100]
+
+
+def _revise_many(root, rounds):
+    # 다른 프로세스의 쓰기: 마지막 바를 계속 고쳐 매번 새 세대 파일로 다시 쓴다
+    store = OhlcvStore(root)
+    df = synthetic_frame("^KS11", "2025-12-31", 2)
+    for i in range(rounds):
+        revised = df.iloc[-1:].copy()
+        revised["Close"] += i
+        store.write("^KS11", revised)
+
+
+def _read_many(root, rounds):
+    store = OhlcvStore(root)
+    for _ in range(rounds):
+        assert len(store.read("^KS11")) == 500
+
+
+def test_processes_share_the_store(tmp_path):
+    # 풀 워커/여러 서버 프로세스가 같은 디렉터리를 써도 서로의 임시 파일을 덮거나 지워진 세대를 열지 않는다
+    store = OhlcvStore(str(tmp_path))
+    store.write("^KS11", synthetic_frame("^KS11", "2025-12-31", 2).iloc[-500:])
+    context = multiprocessing.get_context(analysis.PROCESS_START_METHOD)
+    with ProcessPoolExecutor(max_workers=4, mp_context=context) as pool:
+        futures = [pool.submit(_revise_many, str(tmp_path), 200) for _ in range(2)]
+        futures += [pool.submit(_read_many, str(tmp_path), 400) for _ in range(2)]
+        for future in futures:
+            future.result()
+    assert len(store.read("^KS11")) == 500
+    assert sorted(os.listdir(tmp_path / "1d" / "%5EKS11")) == sorted(
+        [f"{name}.{store.meta('^KS11')['generation']}.bin" for name in ["index", *COLUMNS]] + ["meta.json"]
+        + ([".lock"] if os.path.exists(tmp_path / "1d" / "%5EKS11" / ".lock") else []))
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import analysis
+import main
+from providers import FileProvider, period_start
+
+# 날짜 범위를 넘는 기간은 500 이 아니라 422 로 거절하고, 기간 계산은 예외 대신 "전체"로 본다
+
+
+@pytest.mark.parametrize("period", ["3000y", "99999y", "1000000000d"])
+def test_out_of_range_period_start(period):
+    assert period_start(pd.Timestamp("2025-12-31"), period) is None
+
+
+def test_cached_longer_ignores_out_of_range():
+    previous = analysis._provider
+    analysis.set_provider(FileProvider(years=1))
+    try:
+        analysis.load("^GSPC", "1y")
+        assert analysis._cached_longer("^GSPC", "3000y", "1d") is None
+    finally:
+        analysis.set_provider(previous)
+
+
+def test_span_bounds_period():
+    assert analysis._span("1d", "100y") == ("100y", "1d")
+    with pytest.raises(ValueError, match="period too long"):
+        analysis._span("1d", "101y")
+
+
+@pytest.mark.parametrize("path", ["/analyze", "/analyze/stream", "/chart/BTC-USD/abc.png"])
+@pytest.mark.parametrize("period", ["3000y", "99999y", "1300mo"])
+def test_routes_reject_long_periods(path, period):
+    response = TestClient(main.create_app()).get(path, params={"period": period})
+    assert response.status_code == 422
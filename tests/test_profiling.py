@@ -0,0 +1,32 @@
+from urllib.parse import unquote
+
+import analysis
+from analysis import get_chart
+from profiling import profile_analysis
+from providers import FileProvider
+
+# cold 프로파일링은 별도 프로세스에서 빈 캐시로 측정하고, 서비스 중인 캐시/지표 상태는 건드리지 않는지
+
+
+def test_cold_profile_keeps_shared_state(tmp_path, monkeypatch):
+    monkeypatch.setattr("profiling.PROFILE_DIR", str(tmp_path))
+    previous = analysis._provider
+    analysis.set_provider(FileProvider(years=1))
+    try:
+        warm = analysis.run_analysis(executor="sequential", watchlist=analysis.WATCHLIST)
+        frames = list(analysis._frame_cache)
+        states = {key: entry[1] for key, entry in analysis._states.items()}
+        analysis.clear_charts()
+
+        result = profile_analysis(cold=True, watchlist=analysis.WATCHLIST)
+        assert result["profile"]["stages"]
+        assert list(analysis._frame_cache) == frames
+        assert {key: entry[1] for key, entry in analysis._states.items()} == states
+        # 다른 프로세스에서 그린 차트도 이 프로세스에서 바로 내줄 수 있다
+        for item in result["results"]:
+            assert "error" not in item
+            ticker, version = item["chart"].split("?")[0].split("/")[-2:]
+            assert get_chart(unquote(ticker), version.removesuffix(".png")) is not None
+        assert [item["score"] for item in result["results"]] == [item["score"] for item in warm["results"]]
+    finally:
+        analysis.set_provider(previous)
@@ -0,0 +1,145 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import batch_indicators, btc_macro_score, btc_signals, stock_macro_score, stock_signals
+from providers import synthetic_frame
+
+# 벡터화한 매크로 점수/신호가 예전 행 단위 루프와 같은지 (BTC 는 주말에도 거래해 DXY/TNX 와 달력이 다르다)
+
+END = "2025-12-31"
+
+
+def _legacy_slope(series, window=5):
+    return series.rolling(window).apply(
+        lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x) == window and not np.isnan(x).any() else 0,
+        raw=True,
+    )
+
+
+def _legacy_rsi(series, length=14):
+    delta = series.diff()
+    ema_up = delta.clip(lower=0).ewm(com=length - 1, adjust=False).mean()
+    ema_down = (-1 * delta.clip(upper=0)).ewm(com=length - 1, adjust=False).mean()
+    return 100 - (100 / (1 + ema_up / ema_down))
+
+
+def _legacy_frame(df):
+    df = df.copy()
+    df["MA20"] = df["Close"].rolling(20).mean()
+    df["MA60"] = df["Close"].rolling(60).mean()
+    df["VOL"] = df["Close"].pct_change().rolling(10).std()
+    df["MA20_Slope"] = _legacy_slope(df["MA20"], 5)
+    df["VOL_MA20"] = df["Volume"].rolling(20).mean()
+    df["Internal_Score"] = (df["Volume"] / df["VOL_MA20"] > 1.3).astype(int)
+    df["RSI"] = _legacy_rsi(df["Close"], 14)
+    return df
+
+
+def _legacy_merge(df_res, frame, columns, base_close, method):
+    merge_df = pd.merge(df_res, frame[columns], left_index=True, right_index=True)
+    merge_df["RS"] = merge_df["Close"] / base_close.reindex(merge_df.index, method=method)
+    merge_df["RS_MA20"] = merge_df["RS"].rolling(20).mean()
+    merge_df["RS_Slope"] = _legacy_slope(merge_df["RS"], 5)
+    merge_df["Internal_Strong"] = (merge_df["Internal_Score"].rolling(2).sum() >= 1).astype(int)
+    return merge_df
+
+
+def legacy_btc(btc, dxy, tnx, spx):
+    btc, dxy, tnx, spx = (_legacy_frame(df) for df in (btc, dxy, tnx, spx))
+    results = []
+    for i in range(60, len(btc)):
+        try:
+            date = btc.index[i]
+            d_idx = dxy.index.get_indexer([date], method='pad')[0]
+            t_idx = tnx.index.get_indexer([date], method='pad')[0]
+            s_idx = spx.index.get_indexer([date], method='pad')[0]
+            dxy_s = int(dxy["MA20"].iloc[d_idx] < dxy["MA60"].iloc[d_idx] and np.polyfit(range(10), dxy["MA60"].iloc[d_idx-9:d_idx+1], 1)[0] < 0)
+            rate_s = int(tnx["MA20"].iloc[t_idx] < tnx["MA20"].iloc[t_idx-5])
+            stock_s = int(spx["Close"].iloc[s_idx] > spx["MA60"].iloc[s_idx] and spx["VOL"].iloc[s_idx] < spx["VOL"].iloc[s_idx-5])
+            results.append({"Date": date, "Score": dxy_s + rate_s + stock_s})
+        except Exception:
+            continue
+    df_res = pd.DataFrame(results).set_index("Date")
+    merge_df = _legacy_merge(df_res, btc, ["Close", "MA20", "MA20_Slope", "Volume", "VOL_MA20", "Internal_Score", "RSI"], spx["Close"], "nearest")
+    merge_df["Final_Strong_Signal"] = ((merge_df["Score"] >= 2) & (merge_df["Internal_Strong"] == 1) & (merge_df["MA20_Slope"] > 0)).astype(int)
+    merge_df["Sell_Signal"] = (merge_df["Score"] <= 1).astype(int)
+    return merge_df
+
+
+def legacy_stock(stock, dxy, us10y, baseline):
+    stock, baseline = _legacy_frame(stock), _legacy_frame(baseline)
+    results = []
+    for i in range(60, len(stock)):
+        try:
+            date = stock.index[i]
+            d_idx = dxy.index.get_indexer([date], method='pad')[0]
+            u_idx = us10y.index.get_indexer([date], method='pad')[0]
+            b_idx = baseline.index.get_indexer([date], method='pad')[0]
+            dxy_s = int(dxy["Close"].iloc[d_idx] < dxy["Close"].iloc[d_idx-5])
+            rate_s = int(us10y["Close"].iloc[u_idx] < us10y["Close"].iloc[u_idx-5])
+            base_s = int(baseline["Close"].iloc[b_idx] > baseline["MA60"].iloc[b_idx])
+            results.append({"Date": date, "Score": dxy_s + rate_s + base_s})
+        except Exception:
+            continue
+    df_res = pd.DataFrame(results).set_index("Date")
+    merge_df = _legacy_merge(df_res, stock, ["Close", "MA20", "MA60", "MA20_Slope", "Volume", "VOL_MA20", "Internal_Score", "RSI"], baseline["Close"], "ffill")
+    merge_df["Final_Buy"] = ((merge_df["Score"] >= 2) & (merge_df["MA20_Slope"] > 0) & (merge_df["Internal_Strong"] == 1)).astype(int)
+    merge_df["Sell"] = ((merge_df["Score"] <= 1) & (merge_df["MA20_Slope"] < 0)).astype(int)
+    return merge_df
+
+
+def _frame(symbol, years, holidays=0):
+    # holidays: 시장마다 다른 휴장일을 흉내 내 임의의 날짜를 뺀다
+    df = synthetic_frame(symbol, END, years + 1)
+    df = df[df.index >= pd.Timestamp(END) - pd.DateOffset(years=years)]
+    if holidays:
+        rng = np.random.default_rng(len(symbol) + holidays)
+        df = df.drop(rng.choice(df.index[1:-1], holidays, replace=False))
+    return df
+
+
+def _with_indicators(df):
+    return df.join(batch_indicators(df))
+
+
+@pytest.fixture(params=[1, 2], ids=["1y", "2y"])
+def frames(request):
+    years = request.param
+    return {
+        "BTC-USD": _frame("BTC-USD", years),
+        "DX-Y.NYB": _frame("DX-Y.NYB", years, holidays=9),
+        "^TNX": _frame("^TNX", years, holidays=11),
+        "^GSPC": _frame("^GSPC", years, holidays=7),
+        "066570.KS": _frame("066570.KS", years, holidays=13),
+        "^KS11": _frame("^KS11", years, holidays=13),
+    }
+
+
+def _assert_same(expected, got, columns):
+    assert got.index.equals(expected.index)
+    for col in columns:
+        np.testing.assert_array_equal(got[col].to_numpy(dtype=int), expected[col].to_numpy(dtype=int), err_msg=col)
+
+
+def test_btc_scoring_matches_legacy_loop(frames):
+    btc, dxy, tnx, spx = (_with_indicators(frames[s]) for s in ["BTC-USD", "DX-Y.NYB", "^TNX", "^GSPC"])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = legacy_btc(*(frames[s] for s in ["BTC-USD", "DX-Y.NYB", "^TNX", "^GSPC"]))
+    _assert_same(expected, btc_macro_score(btc, dxy, tnx, spx), ["Score"])
+    got = btc_signals(btc, dxy, tnx, spx)
+    _assert_same(expected, got, ["Score", "Internal_Score", "Internal_Strong", "Final_Strong_Signal", "Sell_Signal"])
+    np.testing.assert_allclose(got["RS"], expected["RS"], rtol=1e-12)
+
+
+def test_stock_scoring_matches_legacy_loop(frames):
+    stock, baseline = _with_indicators(frames["066570.KS"]), _with_indicators(frames["^KS11"])
+    dxy, tnx = frames["DX-Y.NYB"], frames["^TNX"]
+    expected = legacy_stock(frames["066570.KS"], dxy, tnx, frames["^KS11"])
+    _assert_same(expected, stock_macro_score(stock, dxy, tnx, baseline), ["Score"])
+    got = stock_signals(stock, dxy, tnx, baseline)
+    _assert_same(expected, got, ["Score", "Internal_Score", "Internal_Strong", "Final_Buy", "Sell"])
+    np.testing.assert_allclose(got["RS"], expected["RS"], rtol=1e-12)
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+import analysis
+from providers import FileProvider
+
+# 스냅샷 갱신이 분석 슬롯 수를 넘지 않고, 요청 조건이 제각각이어도 스냅샷/잠금이 끝없이 쌓이지 않는지
+
+
+@pytest.fixture
+def fake_analysis(monkeypatch):
+    # run_analysis 대신 잠깐 멈췄다 돌아오는 함수로 동시에 몇 개가 도는지 센다
+    state = {"running": 0, "peak": 0, "calls": 0}
+    lock = threading.Lock()
+
+    def run_analysis(timeout=None, **params):
+        with lock:
+            state["running"] += 1
+            state["calls"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.1)
+        with lock:
+            state["running"] -= 1
+        return {"status": "success", "results": [], "expires_in": 0.0, **params}
+
+    monkeypatch.setattr(analysis, "run_analysis", run_analysis)
+    with analysis._snapshot_lock:
+        analysis._snapshot.clear()
+    yield state
+    with analysis._snapshot_lock:
+        analysis._snapshot.clear()
+
+
+def test_refreshes_share_the_analysis_slots(fake_analysis):
+    futures = [analysis.refresh_snapshot(page=page) for page in range(1, 11)]
+    for future in futures:
+        future.result(timeout=10)
+    assert fake_analysis["calls"] == 10
+    assert fake_analysis["peak"] <= analysis.MAX_CONCURRENT_ANALYSES
+
+
+def test_snapshots_are_bounded(fake_analysis):
+    for days in range(1, analysis.SNAPSHOT_MAXSIZE + 20):
+        result = analysis.get_snapshot(period=f"{days}d")
+        assert result["period"] == f"{days}d"
+    assert len(analysis._snapshot) == analysis.SNAPSHOT_MAXSIZE
+    # 최근 조건은 남아 있어 다시 계산하지 않는다
+    calls = fake_analysis["calls"]
+    analysis.get_snapshot(max_age=60, period=f"{analysis.SNAPSHOT_MAXSIZE + 19}d")
+    assert fake_analysis["calls"] == calls
+
+
+def test_fetch_locks_are_bounded(monkeypatch):
+    monkeypatch.setattr(analysis, "CACHE_MAXSIZE", 8)
+    previous = analysis._provider
+    analysis.set_provider(FileProvider(years=1))
+    try:
+        for days in range(1, 4 * analysis.CACHE_MAXSIZE):
+            analysis.load("^GSPC", f"{days}d")
+        assert len(analysis._fetch_locks) <= 2 * analysis.CACHE_MAXSIZE
+    finally:
+        analysis.set_provider(previous)
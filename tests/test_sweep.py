@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import analysis
+import sweep
+from backtest import signal_frames
+from providers import FileProvider
+
+# 스윕의 기본 파라미터 조합은 분석기 신호(backtest.signal_frames)와 같은 매수/매도를 내야 한다 (규칙이 따로 어긋나지 않게)
+
+
+@pytest.fixture
+def provider():
+    previous = analysis._provider
+    analysis.set_provider(FileProvider(years=3))
+    yield
+    analysis.set_provider(previous)
+
+
+def test_defaults_match_live_signals(provider):
+    watchlist = analysis.WATCHLIST + [("AAPL", "Apple", "^GSPC")]
+    data = sweep.prepare(watchlist, "2y")
+    sweep._init_worker(data)
+    frames = signal_frames(watchlist, "2y")
+    assert data["order"] == list(frames)
+    for ticker in data["order"]:
+        buy, sell = sweep._signals(ticker, sweep.DEFAULTS)
+        _, live_buy, live_sell = frames[ticker]
+        np.testing.assert_array_equal(buy, live_buy.to_numpy())
+        np.testing.assert_array_equal(sell, live_sell.to_numpy())
+        assert buy.any() and sell.any()
+
+
+def test_slope_array_matches_polyfit():
+    values = np.random.default_rng(0).normal(size=40).cumsum()
+    values[17] = np.nan
+    for window in (3, 5, 10):
+        got = analysis.slope_array(values, window)
+        for end in range(window, len(values) + 1):
+            part = values[end - window:end]
+            expected = np.nan if np.isnan(part).any() else np.polyfit(np.arange(window), part, 1)[0]
+            np.testing.assert_allclose(got[end - 1], expected, atol=1e-12)
+        assert np.isnan(got[:window - 1]).all()
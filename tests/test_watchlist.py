@@ -0,0 +1,28 @@
+import pytest
+
+from analysis import load_watchlist
+
+# 관심 종목 csv 의 baseline 칸: 비우면 시장별 기본 지수(BTC-USD 는 BTC 분석기), "none" 이면 BTC 분석기
+
+
+def _write(tmp_path, rows):
+    path = tmp_path / "watchlist.csv"
+    path.write_text("ticker,name,baseline\n" + "".join(f"{row}\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_baselines(tmp_path):
+    path = _write(tmp_path, ["BTC-USD,Bitcoin,", "066570.KS,LG전자,", "035720.KQ,,", "AAPL,Apple,^IXIC", "MSFT,Microsoft,"])
+    assert load_watchlist(path) == [
+        ("BTC-USD", "Bitcoin", None),
+        ("066570.KS", "LG전자", "^KS11"),
+        ("035720.KQ", "035720.KQ", "^KQ11"),
+        ("AAPL", "Apple", "^IXIC"),
+        ("MSFT", "Microsoft", "^GSPC"),
+    ]
+
+
+def test_explicit_none_selects_btc_analyzer(tmp_path):
+    assert load_watchlist(_write(tmp_path, ["BTC-USD,Bitcoin,none"])) == [("BTC-USD", "Bitcoin", None)]
+    with pytest.raises(ValueError):
+        load_watchlist(_write(tmp_path, ["AAPL,Apple,None"]))